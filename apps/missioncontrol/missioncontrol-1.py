@@ -32,10 +32,19 @@ import Gaffer
 import GafferDispatch
 import IECore
 
-try:
-    import GafferUI
-except ImportError:
-    GafferUI = None
+import missioncontrol as missioncontrol_package
+
+from missioncontrol.launch import (
+    execute_startup_file,
+    startup_files
+)
+from missioncontrol.profiling import (
+    ImportProfiler,
+    TraceRecorder
+)
+
+# Startup files of this package needed to dispatch or validate, all others set up the UI
+_HEADLESS_STARTUP_FILES = ("dispatchers.py",)
 
 
 class missioncontrol(Gaffer.Application):
@@ -47,6 +56,10 @@ class missioncontrol(Gaffer.Application):
     def __init__(self):
         super(missioncontrol, self).__init__(self.description)
 
+        self.__startupRecorder = TraceRecorder()
+        self.__importProfiler = None
+        self.__startupFinished = False
+
         self.parameters().addParameters(
             [
                 IECore.FileNameParameter(
@@ -67,11 +80,40 @@ class missioncontrol(Gaffer.Application):
                     description="Opens the UI in full screen mode.",
                     defaultValue=False,
                 ),
+                IECore.BoolParameter(
+                    name="validate",
+                    description="Validates the graphs downstream of the given nodes and reports all problems.",
+                    defaultValue=False,
+                ),
                 IECore.StringVectorParameter(
                     name="nodes",
                     description="The names of the task nodes to dispatch.",
                     defaultValue=IECore.StringVectorData([]),
                 ),
+                IECore.StringVectorParameter(
+                    name="watch",
+                    description="Scripts to watch. They are dispatched once and again whenever they are "
+                                "saved, but only the Roots that changed. Each Root is written to its own "
+                                "taskfile next to the taskfile of the dispatcher. Dispatches the given nodes, "
+                                "or all Roots if no nodes are specified. Runs until interrupted.",
+                    defaultValue=IECore.StringVectorData([]),
+                ),
+                IECore.BoolParameter(
+                    name="snapshot",
+                    description="Loads the script from a snapshot stored next to it, which is a lot faster "
+                                "than executing the script. The snapshot is created on the first load and "
+                                "updated whenever the script changed. Scripts with nodes other than the "
+                                "task nodes and Dots are always loaded the regular way.",
+                    defaultValue=False,
+                ),
+                IECore.StringParameter(
+                    name="profileStartup",
+                    description="Records the import times of all modules and the execution times of all startup "
+                                "scripts until the first window shows up, or the script is loaded in "
+                                "dispatch mode. Writes a Chrome trace if the file ends with .json and a "
+                                "report sorted by duration otherwise.",
+                    defaultValue="",
+                ),
                 IECore.StringVectorParameter(
                     name="settings",
                     description="The values to be set on the nodes or the dispatcher. Values "
@@ -95,7 +137,12 @@ class missioncontrol(Gaffer.Application):
         )
 
     def _run(self, args):
-        if not args["dispatch"].value:
+        if len(args["watch"]):
+            return self.__watch(args)
+
+        if not self.__headless():
+            import GafferUI
+
             self.__setupClipboardSync()
 
             GafferUI.ScriptWindow.connect(self.root())
@@ -104,9 +151,16 @@ class missioncontrol(Gaffer.Application):
             # because `FileMenu.addScript()` may launch
             # interactive dialogues.
             GafferUI.EventLoop.addIdleCallback(functools.partial(self.__addScript, args))
+            GafferUI.EventLoop.addIdleCallback(functools.partial(self.__finishStartup, args, "first window"))
             GafferUI.EventLoop.mainEventLoop().start()
 
         self.__addScript(args)
+        self.__finishStartup(args, "script loaded")
+
+        if args["validate"].value:
+            status = self.__validate(args)
+            if status or not args["dispatch"].value:
+                return status
 
         if args["dispatch"].value:
             self.dispatcher = GafferDispatch.Dispatcher.create(GafferDispatch.Dispatcher.getDefaultDispatcherType())
@@ -115,11 +169,26 @@ class missioncontrol(Gaffer.Application):
                 IECore.msg(IECore.Msg.Level.Error, "missioncontrol dispatch", "No nodes were specified.")
                 return 1
 
-            self.__applySettings(args)
-            self.__dispatch(args)
+            status = self.__applySettings(args)
+            if status:
+                return status
+
+            return self.__dispatch(args)
 
     def __dispatch(self, args):
-        nodes = [self.scriptNode.descendant(node) for node in args["nodes"]]
+        if not len(args["nodes"]):
+            IECore.msg(IECore.Msg.Level.Error, "missioncontrol dispatch", "No nodes were specified.")
+            return 1
+
+        nodes = []
+        for name in args["nodes"]:
+            node = self.scriptNode.descendant(name)
+            if node is None:
+                IECore.msg(IECore.Msg.Level.Error, "missioncontrol dispatch", "No node named \"%s\"." % name)
+            else:
+                nodes.append(node)
+        if len(nodes) != len(args["nodes"]):
+            return 1
 
         try:
             with self.scriptNode.context():
@@ -134,6 +203,47 @@ class missioncontrol(Gaffer.Application):
 
         return 0
 
+    def __watch(self, args):
+        from missioncontrol.dispatch.watch import ScriptWatcher
+
+        self.dispatcher = GafferDispatch.Dispatcher.create(GafferDispatch.Dispatcher.getDefaultDispatcherType())
+        self.__finishStartup(args, "watching")
+
+        scripts = list(args["watch"])
+        if args["script"].value:
+            scripts.insert(0, args["script"].value)
+
+        watcher = ScriptWatcher(
+            self.root(), self.dispatcher, scripts, nodes=list(args["nodes"]),
+            prepare=functools.partial(self.__applySettings, args)
+        )
+        watcher.run()
+
+        return 0
+
+    def __validate(self, args):
+        from missioncontrol.dispatch import validation
+
+        if not len(args["nodes"]):
+            IECore.msg(IECore.Msg.Level.Error, "missioncontrol validate", "No nodes were specified.")
+            return 1
+
+        status = 0
+        for name in args["nodes"]:
+            node = self.scriptNode.descendant(name)
+            if node is None:
+                IECore.msg(IECore.Msg.Level.Error, "missioncontrol validate", "No node named \"%s\"." % name)
+                status = 1
+                continue
+
+            for issue in validation.validate(node):
+                level = IECore.Msg.Level.Error if issue.severity == validation.ERROR else IECore.Msg.Level.Warning
+                IECore.msg(level, "missioncontrol validate : %s" % issue.path, issue.message)
+                if issue.severity == validation.ERROR:
+                    status = 1
+
+        return status
+
     def __addScript(self, args):
         self.scriptNode = Gaffer.ScriptNode()
         Gaffer.NodeAlgo.applyUserDefaults(self.scriptNode)
@@ -141,52 +251,91 @@ class missioncontrol(Gaffer.Application):
 
         if args["script"].value:
             self.scriptNode["fileName"].setValue(os.path.abspath(args["script"].value))
-            self.scriptNode.load()
+            with self.__startupRecorder.span(os.path.basename(args["script"].value), "script load"):
+                self.__loadScript(args)
 
         if not args["dispatch"] and args["fullScreen"].value:
+            import GafferUI
+
             primaryScript = self.root()["scripts"][-1]
             primaryWindow = GafferUI.ScriptWindow.acquire(primaryScript)
             primaryWindow.setFullScreen(True)
 
         return False  # Remove idle callback
 
-    def __applySettings(self, args):
-        if len(args["settings"]) % 2:
-            IECore.msg(IECore.Msg.Level.Error, "missioncontrol dispatch",
-                       "\"settings\" parameter must have matching entry/value pairs")
-            return 1
+    def __loadScript(self, args):
+        if not args["snapshot"].value:
+            self.scriptNode.load()
+            return
 
-        for i in range(0, len(args["settings"]), 2):
-            key = args["settings"][i].lstrip("-")
-            value = args["settings"][i + 1]
-            if key.startswith("dispatcher."):
-                identifier = key.partition("dispatcher.")[-1]
-                status = self.__setValue(identifier, value, self.dispatcher)
-            else:
-                status = self.__setValue(key, value, self.scriptNode)
-            if status:
-                return status
+        from missioncontrol import snapshot
 
-    @staticmethod
-    def __setValue(identifier, value, parent):
-        plug = parent.descendant(identifier)
-        if not plug:
-            IECore.msg(IECore.Msg.Level.Error, "missioncontrol dispatch",
-                       "\"%s\" does not contain a plug named \"%s\"." % (parent.getName(), identifier))
-            return 1
-        if not plug.settable():
-            IECore.msg(IECore.Msg.Level.Error, "missioncontrol dispatch", "\"%s\" cannot be set." % identifier)
-            return 1
+        filepath = self.scriptNode["fileName"].getValue()
+        if not snapshot.load(self.scriptNode, filepath):
+            self.scriptNode.load()
+            snapshot.save(self.scriptNode, filepath)
+
+    def _executeStartupFiles(self, applicationName):
+        if self.parameters()["profileStartup"].getTypedValue():
+            self.__importProfiler = ImportProfiler(self.__startupRecorder).__enter__()
+
+        filepaths = startup_files(applicationName)
+        if self.__headless():
+            # skip the menus, layouts, bookmarks and backups, which would pull in GafferUI and Qt,
+            # the startup files of other locations, like the ones of the studio, are all executed
+            headless_files = os.getenv("MISSIONCONTROL_HEADLESS_STARTUP_FILES")
+            headless_files = headless_files.split(os.pathsep) if headless_files else _HEADLESS_STARTUP_FILES
+            own_directory = os.path.join(os.path.dirname(os.path.realpath(missioncontrol_package.__file__)), "startup")
+            filepaths = [
+                filepath for filepath in filepaths
+                if not os.path.realpath(filepath).startswith(own_directory + os.sep)
+                or os.path.basename(filepath) in headless_files
+            ]
 
-        try:
-            ## \todo: this eval isn't ideal. we should have a way of parsing values
-            # and setting them onto plugs.
-            plug.setValue(eval(value))
-        except Exception as exception:
-            IECore.msg(IECore.Msg.Level.Error, "missioncontrol dispatch: setting \"%s\"" % identifier, str(exception))
-            return 1
+        context = {"application": self}
+        for filepath in filepaths:
+            with self.__startupRecorder.span(os.path.basename(filepath), "startup"):
+                execute_startup_file(filepath, context)
 
-        return 0
+        self.__startupRecorder.mark("startup files executed")
+
+    def __headless(self):
+        return (
+            self.parameters()["dispatch"].getTypedValue() or self.parameters()["validate"].getTypedValue()
+            or len(self.parameters()["watch"].getValue())
+        )
+
+    def __finishStartup(self, args, label):
+        if self.__startupFinished:
+            return False
+        self.__startupFinished = True
+
+        self.__startupRecorder.mark(label)
+        if self.__importProfiler:
+            self.__importProfiler.__exit__()
+            self.__importProfiler = None
+
+        filepath = args["profileStartup"].value
+        if filepath:
+            self.__startupRecorder.write(filepath)
+            IECore.msg(IECore.Msg.Level.Info, "missioncontrol", "Startup profile written to \"%s\"." % filepath)
+
+        return False  # Remove idle callback
+
+    def __applySettings(self, args, scriptNode=None):
+        from missioncontrol import settings
+
+        assignments, errors = settings.resolve(
+            list(args["settings"]), scriptNode or self.scriptNode, self.dispatcher
+        )
+        if not errors:
+            errors = settings.apply(assignments)
+
+        for error in errors:
+            IECore.msg(IECore.Msg.Level.Error, "missioncontrol dispatch : setting \"%s\"" % error.identifier,
+                       error.message)
+
+        return 1 if errors else 0
 
     def __setupClipboardSync(self):
         ## This function sets up two way syncing between the clipboard held in the Gaffer::ApplicationRoot
@@ -212,27 +361,38 @@ class missioncontrol(Gaffer.Application):
     def __clipboardContentsChanged(self, applicationRoot):
         assert (applicationRoot.isSame(self.root()))
 
-        data = applicationRoot.getClipboardContents()
+        from missioncontrol import clipboard as clipboardsync
+
+        # the text is only produced once another application asks for it
+        mimeData = clipboardsync.mime_data(applicationRoot.getClipboardContents())
+        if mimeData is None:
+            return
 
         from Qt import QtWidgets
         clipboard = QtWidgets.QApplication.clipboard()
         try:
             self.__ignoreQtClipboardContentsChanged = True  # avoid triggering an unecessary copy back in __qtClipboardContentsChanged
-            clipboard.setText(str(data))
+            # keep a reference, so the mime data outlives the Python wrapper
+            self.__clipboardMimeData = mimeData
+            clipboard.setMimeData(mimeData)
         finally:
             self.__ignoreQtClipboardContentsChanged = False
 
     def __qtClipboardContentsChanged(self):
-        import GafferUI
         if self.__ignoreQtClipboardContentsChanged:
             return
 
         from Qt import QtWidgets
+        from missioncontrol import clipboard as clipboardsync
 
-        text = QtWidgets.QApplication.clipboard().text().encode("utf-8")
-        if text:
-            with Gaffer.BlockedConnection(self.__clipboardContentsChangedConnection):
-                self.root().setClipboardContents(IECore.StringData(text))
+        clipboard = QtWidgets.QApplication.clipboard()
+        if clipboard.ownsClipboard():
+            # our own contents, the application clipboard holds them already
+            return
 
+        text = clipboard.text()
+        if text and clipboardsync.should_import(text):
+            with Gaffer.BlockedConnection(self.__clipboardContentsChangedConnection):
+                self.root().setClipboardContents(IECore.StringData(clipboardsync.decompress(text)))
 
 IECore.registerRunTimeTyped(missioncontrol)
@@ -0,0 +1,213 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Backups of the open scripts that stay out of the way of the UI.
+
+A daemon thread decides when a script is due, writing and rotating the backup
+files happens in the background. `script.serialise()` can only read the graph
+on the UI thread though, so each backup still blocks the UI for the time it
+takes to serialise the script. Scripts without changes since their last
+backup are skipped and the interval between two backups of a script grows
+with its size, so big scripts don't cause that hitch every minute.
+
+The files are written to the location `GafferUI.Backups` uses, by default
+    <script directory>/.gafferBackups/<script name>-backup<number>.gfr
+so the recovery of backups offered by Gaffer's File menu keeps working as
+long as a `GafferUI.Backups` instance is acquired, with its own periodic
+backups turned off.
+"""
+
+import functools
+import logging
+import os
+import threading
+import weakref
+
+from timeit import default_timer
+
+import Gaffer
+
+from jobtronaut.constants import LOGGING_NAMESPACE
+
+from missioncontrol.profiling import PhaseTimer
+
+_LOG = logging.getLogger("{}.gaffer.backups".format(LOGGING_NAMESPACE))
+
+_INSTANCES = weakref.WeakKeyDictionary()
+
+# the default of the `fileName` backup preference of Gaffer
+DEFAULT_FILE_NAME = "${script:directory}/.gafferBackups/${script:name}-backup${backup:number}.gfr"
+
+
+class AsyncBackups(object):
+    """ Periodic backups of all scripts of an application
+
+    Args:
+        application_root (Gaffer.ApplicationRoot): the root holding the scripts
+        frequency (float): seconds between two backups of small scripts
+        size_step (int): the interval grows by `frequency` for every
+            `size_step` bytes of the last backup of a script
+        files (int): the number of backup files per script
+        check_interval (float): seconds between two checks for due scripts
+        file_name (str): the backup file path, substituted in the context of the
+            script with `script:directory`, `script:name` and `backup:number` set
+
+    """
+    def __init__(self, application_root, frequency=60.0, size_step=4 * 1024 * 1024, files=5, check_interval=5.0,
+                 file_name=DEFAULT_FILE_NAME):
+        self.frequency = frequency
+        self.file_name = file_name
+        self.size_step = size_step
+        self.files = files
+        self.check_interval = check_interval
+        self.timer = PhaseTimer("backups")
+
+        self._scripts = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+        scripts = application_root["scripts"]
+        self._child_added_connection = scripts.childAddedSignal().connect(Gaffer.WeakMethod(self._script_added))
+        self._child_removed_connection = scripts.childRemovedSignal().connect(Gaffer.WeakMethod(self._script_removed))
+        for script in scripts.children(Gaffer.ScriptNode):
+            self._script_added(scripts, script)
+
+        self._thread = threading.Thread(target=self._run, name="missioncontrol-backups")
+        self._thread.daemon = True
+        self._thread.start()
+
+    @classmethod
+    def acquire(cls, application, **kwargs):
+        """ Returns the backups of the given application, starting them if necessary """
+        root = application.root()
+        if root not in _INSTANCES:
+            _INSTANCES[root] = cls(root, **kwargs)
+        return _INSTANCES[root]
+
+    def stop(self):
+        self._stopped.set()
+
+    def interval(self, size):
+        """ Returns the seconds to wait after a backup of the given size """
+        return self.frequency * (1 + size // self.size_step)
+
+    def backup_path(self, script, number):
+        """ Returns the path of the given backup of a script, needs to be called on the UI thread """
+        filepath = script["fileName"].getValue()
+        context = Gaffer.Context(script.context())
+        context["script:directory"] = os.path.dirname(filepath)
+        context["script:name"] = os.path.splitext(os.path.basename(filepath))[0]
+        context["backup:number"] = number
+        return context.substitute(self.file_name)
+
+    # Change tracking, called on the UI thread
+
+    def _script_added(self, parent, script):
+        if not isinstance(script, Gaffer.ScriptNode):
+            return
+        state = {
+            "changes": 0,
+            "backed_up": 0,
+            "due": default_timer() + self.frequency,
+            "number": 0,
+            "pending": False,
+        }
+        state["connection"] = script.actionSignal().connect(functools.partial(_count_change, state))
+        with self._lock:
+            self._scripts[script.getName()] = (weakref.ref(script), state)
+
+    def _script_removed(self, parent, script):
+        with self._lock:
+            self._scripts.pop(script.getName(), None)
+
+    # Scheduling, called on the worker thread
+
+    def _run(self):
+        import GafferUI
+
+        while not self._stopped.wait(self.check_interval):
+            now = default_timer()
+            with self._lock:
+                due = [
+                    (reference, state) for reference, state in self._scripts.values()
+                    if not state["pending"] and now >= state["due"]
+                ]
+            for reference, state in due:
+                if state["changes"] == state["backed_up"]:
+                    self.timer.add("skipped, unchanged", 0.0)
+                    state["due"] = now + self.frequency
+                    continue
+                state["pending"] = True
+                GafferUI.EventLoop.executeOnUIThread(functools.partial(self._serialise, reference, state))
+
+    def _serialise(self, reference, state):
+        """ Takes the snapshot on the UI thread and hands it over to a writer thread """
+        script = reference()
+        if script is None or not script["fileName"].getValue():
+            state["pending"] = False
+            state["due"] = default_timer() + self.frequency
+            return
+
+        changes = state["changes"]
+        start = default_timer()
+        text = script.serialise()
+        serialise_time = default_timer() - start
+        self.timer.add("serialisation", serialise_time)
+
+        state["number"] = state["number"] % self.files + 1
+        filepath = self.backup_path(script, state["number"])
+
+        writer = threading.Thread(
+            target=self._write, args=(filepath, text, state, changes, serialise_time), name="missioncontrol-backup"
+        )
+        writer.daemon = True
+        writer.start()
+
+    def _write(self, filepath, text, state, changes, serialise_time):
+        start = default_timer()
+        try:
+            directory = os.path.dirname(filepath)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            temporary = "{}.{}".format(filepath, os.getpid())
+            with open(temporary, "w") as fp:
+                fp.write(text)
+            os.rename(temporary, filepath)
+        except (IOError, OSError):
+            _LOG.exception("Failed to write the backup {}.".format(filepath))
+        else:
+            state["backed_up"] = changes
+        finally:
+            write_time = default_timer() - start
+            self.timer.add("file i/o", write_time)
+            state["due"] = default_timer() + self.interval(len(text))
+            state["pending"] = False
+
+        _LOG.debug("Backed up {} ({} kB), serialisation {:.3f}s on the UI thread, writing {:.3f}s.".format(
+            filepath, len(text) // 1024, serialise_time, write_time
+        ))
+
+
+def _count_change(state, *args):
+    state["changes"] += 1
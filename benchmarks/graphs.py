@@ -0,0 +1,151 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Generator for synthetic missioncontrol graphs.
+
+Graphs are built top down starting from a single `Root`. Each `HierarchyTask`
+gets a `Serial` or `Parallel` group (alternating per nesting level) below it
+with `fanout` children. Children are `HierarchyTask` nodes until the requested
+amount is reached or the maximum depth is hit, `JobtronautTask` leaves otherwise.
+"""
+
+import random
+
+from collections import deque, namedtuple
+
+import imath
+
+import Gaffer
+
+GraphSpec = namedtuple(
+    "GraphSpec",
+    ["hierarchy_tasks", "depth", "fanout", "dot_density", "processor_chain", "seed"]
+)
+GraphSpec.__new__.__defaults__ = (100, 4, 4, 0.1, 2, 0)
+
+_X_SPACING = 20.0
+_Y_SPACING = 10.0
+
+
+class _Builder(object):
+    def __init__(self, scriptnode, spec):
+        self.scriptnode = scriptnode
+        self.spec = spec
+        self.random = random.Random(spec.seed)
+        self.counts = {}
+
+    def add(self, node, position):
+        self.scriptnode.addChild(node)
+        Gaffer.Metadata.registerValue(node, "__uiPosition", imath.V2f(*position))
+        name = type(node).__name__
+        self.counts[name] = self.counts.get(name, 0) + 1
+        return node
+
+    def connect(self, source, destination, position):
+        """ Connects two plugs, optionally routing the connection through a Dot """
+        if self.random.random() < self.spec.dot_density:
+            dot = self.add(Gaffer.Dot(), position)
+            dot.setup(source)
+            dot["in"].setInput(source)
+            source = dot["out"]
+        destination.setInput(source)
+
+    def add_processors(self, hierarchy_task, position):
+        from missioncontrol.nodes import JobtronautProcessor
+
+        previous = None
+        for index in range(self.spec.processor_chain):
+            processor = self.add(
+                JobtronautProcessor("Processor", "BenchmarkProcessor"),
+                (position[0] + _X_SPACING, position[1] + _Y_SPACING * (self.spec.processor_chain - index))
+            )
+            if previous:
+                self.connect(previous["out"], processor["in"], (position[0] + _X_SPACING, position[1]))
+            previous = processor
+
+        if previous:
+            self.connect(previous["out"], hierarchy_task["processor"], (position[0] + _X_SPACING, position[1]))
+
+
+def build(scriptnode, spec=GraphSpec()):
+    """ Builds a synthetic graph into the given script node
+
+    Args:
+        scriptnode (Gaffer.ScriptNode): the script to add the nodes to
+        spec (GraphSpec): the shape of the graph
+
+    Returns:
+        tuple: the `Root` node and a mapping of node type names to their counts
+
+    """
+    from missioncontrol.nodes import (
+        Root,
+        Serial,
+        Parallel,
+        HierarchyTask,
+        JobtronautTask
+    )
+
+    builder = _Builder(scriptnode, spec)
+    root = builder.add(Root("Root"), (0, 0))
+
+    top = builder.add(HierarchyTask("HierarchyTask"), (0, -_Y_SPACING))
+    builder.connect(root["out"], top["in"], (0, -_Y_SPACING / 2))
+    builder.add_processors(top, (0, -_Y_SPACING))
+    remaining = spec.hierarchy_tasks - 1
+
+    queue = deque([(top, 1, (0, -_Y_SPACING))])
+    while queue:
+        parent, depth, (x, y) = queue.popleft()
+
+        group_type = Serial if depth % 2 else Parallel
+        group = builder.add(group_type(group_type.__name__), (x, y - _Y_SPACING))
+        builder.connect(parent["out"], group["in"], (x, y - _Y_SPACING / 2))
+
+        for index in range(spec.fanout):
+            position = (x + (index - spec.fanout / 2.0) * _X_SPACING, y - 2 * _Y_SPACING)
+            if remaining > 0 and depth < spec.depth:
+                child = builder.add(HierarchyTask("HierarchyTask"), position)
+                builder.add_processors(child, position)
+                queue.append((child, depth + 1, position))
+                remaining -= 1
+            else:
+                child = builder.add(JobtronautTask("BenchmarkTask", "BenchmarkTask"), position)
+            builder.connect(group["out"], child["in"], (position[0], position[1] + _Y_SPACING / 2))
+
+    return root, builder.counts
+
+
+def write(filepath, spec=GraphSpec()):
+    """ Builds a synthetic graph and saves it as .gfr script
+
+    Returns:
+        dict: a mapping of node type names to their counts
+
+    """
+    scriptnode = Gaffer.ScriptNode()
+    _, counts = build(scriptnode, spec)
+    scriptnode["fileName"].setValue(filepath)
+    scriptnode.save()
+    return counts
@@ -0,0 +1,218 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Measures the memory footprint of the missioncontrol node types.
+
+For every node type N instances are added to a script node. Reported are the
+retained bytes per node (traced Python allocations and resident set size), the
+top allocation sites, the growth of the logging registry and the amount of
+instance metadata registrations. After removing the nodes again the remaining
+growth is reported, which is the memory that never gets released.
+
+Allocations are traced with tracemalloc, which needs Python 3.4 or newer.
+Older interpreters report the object types with the largest growth in
+instances instead, counted by the garbage collector.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import sys
+import time
+
+from collections import OrderedDict
+
+try:
+    import tracemalloc
+except ImportError:
+    # not available before Python 3.4
+    tracemalloc = None
+
+from missioncontrol.benchmarks import stubs
+from missioncontrol.benchmarks.run import (
+    RESULTS_DIRECTORY,
+    git_revision,
+    save
+)
+
+
+def _resident_bytes():
+    try:
+        with open("/proc/self/statm") as fp:
+            return int(fp.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (IOError, OSError, ValueError):
+        return 0
+
+
+def _type_counts():
+    """ Counts the objects tracked by the garbage collector per type """
+    counts = {}
+    for obj in gc.get_objects():
+        name = "{}.{}".format(type(obj).__module__, type(obj).__name__)
+        counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def _metadata_registrations(graph_component):
+    """ Counts the instance metadata registered on a graph component and all its plugs """
+    import Gaffer
+
+    def _registered(target):
+        try:
+            return len(Gaffer.Metadata.registeredValues(target, instanceOnly=True))
+        except TypeError:
+            return len(Gaffer.Metadata.registeredValues(target))
+
+    count = _registered(graph_component)
+    for child in graph_component.children(Gaffer.Plug):
+        count += _metadata_registrations(child)
+    return count
+
+
+def _node_factories():
+    from missioncontrol.nodes import (
+        JobtronautTask,
+        JobtronautProcessor,
+        HierarchyTask,
+        Root,
+        Parallel,
+        Serial
+    )
+
+    return OrderedDict([
+        ("JobtronautTask", lambda: JobtronautTask("BenchmarkTask", "BenchmarkTask")),
+        ("JobtronautProcessor", lambda: JobtronautProcessor("BenchmarkProcessor", "BenchmarkProcessor")),
+        ("HierarchyTask", HierarchyTask),
+        ("Root", Root),
+        ("Parallel", Parallel),
+        ("Serial", Serial),
+    ])
+
+
+def measure(factory, count, top=10):
+    """ Measures the memory retained by `count` nodes created by `factory`
+
+    Returns:
+        OrderedDict: the measurements
+
+    """
+    import Gaffer
+
+    scriptnode = Gaffer.ScriptNode()
+    loggers = len(logging.Logger.manager.loggerDict)
+
+    gc.collect()
+    resident = _resident_bytes()
+    if tracemalloc:
+        before = tracemalloc.take_snapshot()
+        traced = tracemalloc.get_traced_memory()[0]
+    else:
+        types = _type_counts()
+
+    for _ in range(count):
+        scriptnode.addChild(factory())
+
+    gc.collect()
+    result = OrderedDict()
+    result["resident_bytes_per_node"] = (_resident_bytes() - resident) / float(count)
+    if tracemalloc:
+        result["traced_bytes_per_node"] = (tracemalloc.get_traced_memory()[0] - traced) / float(count)
+        result["top_allocations"] = [
+            str(statistic) for statistic in tracemalloc.take_snapshot().compare_to(before, "lineno")[:top]
+        ]
+    else:
+        growth = sorted(
+            ((instances - types.get(name, 0), name) for name, instances in _type_counts().items()), reverse=True
+        )
+        result["top_object_types"] = [
+            "{}: +{} ({:.1f} per node)".format(name, added, added / float(count))
+            for added, name in growth[:top] if added > 0
+        ]
+    result["loggers_per_node"] = (len(logging.Logger.manager.loggerDict) - loggers) / float(count)
+    result["metadata_registrations_per_node"] = sum(
+        _metadata_registrations(node) for node in scriptnode.children(Gaffer.Node)
+    ) / float(count)
+
+    for name in [node.getName() for node in scriptnode.children(Gaffer.Node)]:
+        scriptnode.removeChild(scriptnode[name])
+    del scriptnode
+    gc.collect()
+
+    result["unreleased_resident_bytes_per_node"] = (_resident_bytes() - resident) / float(count)
+    if tracemalloc:
+        result["unreleased_traced_bytes_per_node"] = (tracemalloc.get_traced_memory()[0] - traced) / float(count)
+    result["unreleased_loggers"] = len(logging.Logger.manager.loggerDict) - loggers
+
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1000, help="Number of instances per node type")
+    parser.add_argument("--top", type=int, default=10, help="Number of reported allocation sites")
+    parser.add_argument("--stub-plugins", action="store_true", help="Use the stand-ins even if jobtronaut exists")
+    parser.add_argument("--output", help="Result file, defaults to <revision>-memory.json in {}".format(
+        RESULTS_DIRECTORY
+    ))
+    args = parser.parse_args(argv)
+
+    stubbed = stubs.install(force=args.stub_plugins)
+
+    if tracemalloc:
+        tracemalloc.start(25)
+    else:
+        print(
+            "tracemalloc isn't available on Python {}.{}, reporting the object types with the largest growth "
+            "instead of the top allocation sites.\n".format(*sys.version_info[:2])
+        )
+
+    revision = git_revision()
+    result = OrderedDict([
+        ("revision", revision),
+        ("time", time.strftime("%Y-%m-%dT%H:%M:%S")),
+        ("stubbed_plugins", stubbed),
+        ("count", args.count),
+        ("nodes", OrderedDict()),
+    ])
+
+    for name, factory in _node_factories().items():
+        # create one instance upfront, so one-time costs like imports are not accounted to the nodes
+        factory()
+        result["nodes"][name] = measurements = measure(factory, args.count, top=args.top)
+
+        print(name)
+        for key, value in measurements.items():
+            if key in ("top_allocations", "top_object_types"):
+                for line in value:
+                    print("    {}".format(line))
+            else:
+                print("  {:<40} {:>14.1f}".format(key, value))
+
+    save(result, args.output or os.path.join(RESULTS_DIRECTORY, "{}-memory.json".format(revision)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Times the main stages of missioncontrol on synthetic graphs.
+
+Results are stored as JSON, named after the current commit, so runs of
+different commits can be compared with `--compare`.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from collections import OrderedDict
+from timeit import default_timer
+
+from missioncontrol.benchmarks import stubs
+
+# kept out of the package, can be set by `MISSIONCONTROL_BENCHMARK_RESULTS`
+RESULTS_DIRECTORY = os.getenv("MISSIONCONTROL_BENCHMARK_RESULTS") or os.path.expanduser("~/.missioncontrol/benchmarks")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).decode("utf-8").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save(result, filepath):
+    """ Writes a benchmark result as JSON, creating missing directories """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(filepath, "w") as fp:
+        json.dump(result, fp, indent=4)
+
+
+def _best(function, repeat):
+    """ Returns the fastest of `repeat` runs of `function` in seconds """
+    timings = []
+    for _ in range(repeat):
+        start = default_timer()
+        function()
+        timings.append(default_timer() - start)
+    return min(timings)
+
+
+def run(spec, repeat=3):
+    """ Runs all benchmarks for the given graph shape
+
+    Args:
+        spec (missioncontrol.benchmarks.graphs.GraphSpec): the shape of the graph
+        repeat (int): how often each stage is timed, the fastest run is reported
+
+    Returns:
+        OrderedDict: the timings in seconds per stage
+
+    """
+    import Gaffer
+
+    from missioncontrol.benchmarks import graphs
+    from missioncontrol.dispatch import JobtronautDispatcher
+
+    directory = tempfile.mkdtemp(prefix="missioncontrol_benchmark_")
+    try:
+        scriptpath = os.path.join(directory, "benchmark.gfr")
+        results = OrderedDict()
+
+        results["node construction"] = _best(lambda: graphs.build(Gaffer.ScriptNode(), spec), repeat)
+        results["node counts"] = graphs.write(scriptpath, spec)
+
+        def _load():
+            scriptnode = Gaffer.ScriptNode()
+            scriptnode["fileName"].setValue(scriptpath)
+            scriptnode.load()
+            return scriptnode
+
+        results["script load"] = _best(_load, repeat)
+
+        scriptnode = _load()
+        root = scriptnode["Root"]
+        hierarchy_nodes = JobtronautDispatcher.get_hierarchy_nodes(root, scriptnode)
+
+        results["get_hierarchy_nodes"] = _best(
+            lambda: JobtronautDispatcher.get_hierarchy_nodes(root, scriptnode), repeat
+        )
+        results["get_required_tasks"] = _best(
+            lambda: [JobtronautDispatcher.get_required_tasks(node, scriptnode) for node in hierarchy_nodes], repeat
+        )
+
+        dispatcher = JobtronautDispatcher()
+        dispatcher["taskfile"].setValue(os.path.join(directory, "tasks.py"))
+        # every repeat has to render the taskfile, not restore it from an earlier run
+        dispatcher["cache"].setValue(False)
+
+        def _dispatch():
+            with scriptnode.context():
+                dispatcher.dispatch([root])
+
+        results["dispatch"] = _best(_dispatch, repeat)
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def simulate(spec, blades):
+    """ Simulates the synthetic job on the farm, every task taking one unit of time
+
+    Graph layouts that serialise more work show up as a longer makespan and a
+    lower utilisation, independent of the speed of the machine.
+
+    Returns:
+        OrderedDict: the makespan and utilisation per number of blades
+
+    """
+    import Gaffer
+
+    from missioncontrol.benchmarks import graphs
+    from missioncontrol.dispatch import (
+        analysis,
+        simulation
+    )
+
+    scriptnode = Gaffer.ScriptNode()
+    root, _ = graphs.build(scriptnode, spec)
+    structure, tasks = analysis.job_structure(root)
+    graph = analysis.JobGraph(structure, tasks)
+
+    results = OrderedDict()
+    for count in blades:
+        report = simulation.report(graph, count)
+        results[str(count)] = OrderedDict([
+            ("makespan", report["makespan"]),
+            ("utilisation", report["utilisation"]),
+            ("max_queue_depth", report["max_queue_depth"]),
+        ])
+    return results
+
+
+def compare(current, previous):
+    """ Prints the relative change of all stage timings """
+    for stage, seconds in current["timings"].items():
+        before = previous["timings"].get(stage)
+        if not isinstance(seconds, float) or not before:
+            continue
+        print("{:<24} {:>10.4f}s {:>10.4f}s {:>+8.1f}%".format(
+            stage, before, seconds, (seconds - before) / before * 100.0
+        ))
+
+    for blades, simulated in current.get("simulation", {}).items():
+        before = previous.get("simulation", {}).get(blades)
+        if before:
+            print("{:<24} {:>10g} {:>10g} {:>+8.1f}%".format(
+                "makespan, {} blades".format(blades), before["makespan"], simulated["makespan"],
+                (simulated["makespan"] - before["makespan"]) / before["makespan"] * 100.0
+                if before["makespan"] else 0.0
+            ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hierarchy-tasks", type=int, default=100)
+    parser.add_argument("--depth", type=int, default=4, help="Serial/Parallel nesting depth")
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--dot-density", type=float, default=0.1, help="Probability to route a connection via a Dot")
+    parser.add_argument("--processor-chain", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--blades", type=int, nargs="*", default=[10, 100], help="Virtual blades to simulate")
+    parser.add_argument("--stub-plugins", action="store_true", help="Use the stand-ins even if jobtronaut exists")
+    parser.add_argument("--output", help="Result file, defaults to <revision>.json in {}".format(RESULTS_DIRECTORY))
+    parser.add_argument("--compare", help="Result file of a previous run to compare with")
+    args = parser.parse_args(argv)
+
+    stubbed = stubs.install(force=args.stub_plugins)
+
+    from missioncontrol.benchmarks.graphs import GraphSpec
+
+    spec = GraphSpec(
+        hierarchy_tasks=args.hierarchy_tasks,
+        depth=args.depth,
+        fanout=args.fanout,
+        dot_density=args.dot_density,
+        processor_chain=args.processor_chain,
+        seed=args.seed
+    )
+
+    revision = git_revision()
+    result = OrderedDict([
+        ("revision", revision),
+        ("time", time.strftime("%Y-%m-%dT%H:%M:%S")),
+        ("stubbed_plugins", stubbed),
+        ("spec", OrderedDict(zip(spec._fields, spec))),
+        ("timings", run(spec, repeat=args.repeat)),
+        ("simulation", simulate(spec, args.blades)),
+    ])
+
+    for stage, value in result["timings"].items():
+        print("{:<24} {}".format(stage, value))
+    for blades, simulated in result["simulation"].items():
+        print("{:<24} {:g}, {:.1%} utilisation".format(
+            "makespan, {} blades".format(blades), simulated["makespan"], simulated["utilisation"]
+        ))
+
+    save(result, args.output or os.path.join(RESULTS_DIRECTORY, "{}.json".format(revision)))
+
+    if args.compare:
+        with open(args.compare) as fp:
+            compare(result, json.load(fp))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
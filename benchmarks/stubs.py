@@ -0,0 +1,131 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Stand-ins for the parts of jobtronaut missioncontrol relies on.
+
+They allow to run the benchmarks without a studio plugin installation. Every
+requested task or processor name resolves to the same stand-in plugin class,
+so arbitrary synthetic graphs can be built.
+"""
+
+import os
+import sys
+import types
+
+_MODULES = (
+    "jobtronaut",
+    "jobtronaut.constants",
+    "jobtronaut.author",
+    "jobtronaut.author.plugins",
+)
+
+
+class Task(object):
+    """ Stand-in for `jobtronaut.author.Task`. """
+    title = ""
+    description = "Benchmark stand-in task."
+    required_tasks = []
+
+
+class ProcessorDefinition(object):
+    """ Stand-in for `jobtronaut.author.ProcessorDefinition`. """
+    def __init__(self, name, scope=None, parameters=None):
+        self.name = name
+        self.scope = scope or []
+        self.parameters = parameters or {}
+
+
+class Processor(object):
+    """ Stand-in for `jobtronaut.author.Processor`. """
+    description = "Benchmark stand-in processor."
+    parameters = {
+        "text": "value",
+        "factor": 1.0,
+        "enabled": True,
+        "count": 1,
+        "names": ["a", "b"],
+    }
+
+
+class Plugins(object):
+    """ Stand-in for `jobtronaut.author.plugins.Plugins`.
+
+    Every name resolves to a plugin, the name registries can be filled by
+    `register`.
+    """
+    tasks = {}
+    processors = {}
+
+    def task(self, name):
+        return self.tasks.get(name, Task)
+
+    def processor(self, name):
+        return self.processors.get(name, Processor)
+
+    def get_module_path(self, name):
+        return os.path.abspath(__file__)
+
+    @classmethod
+    def register(cls, task_names=(), processor_names=()):
+        cls.tasks.update((name, Task) for name in task_names)
+        cls.processors.update((name, Processor) for name in processor_names)
+
+
+def install(force=False):
+    """ Installs the stand-ins as jobtronaut modules
+
+    Args:
+        force (bool): replace an importable jobtronaut installation as well
+
+    Returns:
+        bool: True if the stand-ins are in use
+
+    """
+    if not force:
+        try:
+            import jobtronaut.author.plugins
+            return False
+        except ImportError:
+            pass
+
+    modules = {}
+    for name in _MODULES:
+        modules[name] = sys.modules[name] = types.ModuleType(name)
+
+    modules["jobtronaut"].constants = modules["jobtronaut.constants"]
+    modules["jobtronaut"].author = modules["jobtronaut.author"]
+    modules["jobtronaut.author"].plugins = modules["jobtronaut.author.plugins"]
+
+    modules["jobtronaut.constants"].LOGGING_NAMESPACE = "jobtronaut"
+    modules["jobtronaut.constants"].PLUGIN_PATH = []
+
+    modules["jobtronaut.author"].Task = Task
+    modules["jobtronaut.author"].Processor = Processor
+    modules["jobtronaut.author"].ProcessorDefinition = ProcessorDefinition
+
+    modules["jobtronaut.author.plugins"].Plugins = Plugins
+    modules["jobtronaut.author.plugins"].Task = Task
+    modules["jobtronaut.author.plugins"].Processor = Processor
+
+    return True
@@ -0,0 +1,121 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Lazy syncing of the application clipboard with the system clipboard.
+
+The text of copied nodes is only produced once another application actually
+asks for it. Contents above `MISSIONCONTROL_CLIPBOARD_LIMIT` bytes (8 MB by
+default) are either not synced at all or compressed, depending on
+`MISSIONCONTROL_CLIPBOARD_OVERSIZE` ("compress" by default, or "skip").
+Compressed contents can only be pasted into other missioncontrol sessions.
+"""
+
+import base64
+import logging
+import os
+import zlib
+
+import IECore
+
+from Qt import QtCore
+
+from jobtronaut.constants import LOGGING_NAMESPACE
+
+_LOG = logging.getLogger("{}.gaffer.clipboard".format(LOGGING_NAMESPACE))
+
+_MARKER = b"missioncontrol:zlib:"
+
+SKIP = "skip"
+COMPRESS = "compress"
+
+
+def limit():
+    return int(os.getenv("MISSIONCONTROL_CLIPBOARD_LIMIT", 8 * 1024 * 1024))
+
+
+def oversize_mode():
+    return os.getenv("MISSIONCONTROL_CLIPBOARD_OVERSIZE", COMPRESS)
+
+
+def _bytes(text):
+    return text if isinstance(text, bytes) else text.encode("utf-8")
+
+
+def compress(text):
+    return _MARKER + base64.b64encode(zlib.compress(_bytes(text)))
+
+
+def decompress(text):
+    """ Returns the original contents of compressed text, other text is returned unchanged """
+    text = _bytes(text)
+    if text.startswith(_MARKER):
+        return zlib.decompress(base64.b64decode(text[len(_MARKER):]))
+    return text
+
+
+def _size(data):
+    # node serialisations are StringData, their size is known without converting them
+    return len(data.value) if isinstance(data, IECore.StringData) else 0
+
+
+class LazyMimeData(QtCore.QMimeData):
+    """ Offers the clipboard contents as plain text, converting them on the first request """
+    def __init__(self, data, compressed=False):
+        super(LazyMimeData, self).__init__()
+        self._data = data
+        self._compressed = compressed
+        self._text = None
+
+    def formats(self):
+        return ["text/plain"]
+
+    def hasFormat(self, mime_type):
+        return mime_type == "text/plain"
+
+    def retrieveData(self, mime_type, preferred_type):
+        if mime_type != "text/plain":
+            return None
+        if self._text is None:
+            text = _bytes(self._data.value if isinstance(self._data, IECore.StringData) else str(self._data))
+            self._text = compress(text) if self._compressed else text
+            self._data = None
+        return QtCore.QByteArray(self._text)
+
+
+def mime_data(data):
+    """ Returns the mime data to put on the system clipboard, None if it shouldn't be synced """
+    if _size(data) <= limit():
+        return LazyMimeData(data)
+    if oversize_mode() == SKIP:
+        _LOG.info("The copied contents exceed {} bytes, they are not synced with the system clipboard.".format(limit()))
+        return None
+    return LazyMimeData(data, compressed=True)
+
+
+def should_import(text):
+    """ Returns False for external contents that exceed the limit while oversized contents are skipped """
+    if len(text) <= limit() or oversize_mode() != SKIP:
+        return True
+    _LOG.info("The system clipboard exceeds {} bytes, it is not synced with the application.".format(limit()))
+    return False
@@ -26,9 +26,16 @@ import GafferDispatch
 import IECore
 
 from trixterdispatcher import JobtronautDispatcher
+from local import JobtronautLocalDispatcher
 
 GafferDispatch.Dispatcher.deregisterDispatcher("Tractor")
 GafferDispatch.Dispatcher.deregisterDispatcher("Local")
 
 IECore.registerRunTimeTyped(JobtronautDispatcher, typeName="trixterdispatcher::JobtronautDispatcher")
 GafferDispatch.Dispatcher.registerDispatcher("JobtronautDispatcher", JobtronautDispatcher, JobtronautDispatcher.initialize)
+
+# a stand-in for the farm, runs the jobs on this machine
+IECore.registerRunTimeTyped(JobtronautLocalDispatcher, typeName="trixterdispatcher::JobtronautLocalDispatcher")
+GafferDispatch.Dispatcher.registerDispatcher(
+    "JobtronautLocalDispatcher", JobtronautLocalDispatcher, JobtronautLocalDispatcher.initialize
+)
@@ -0,0 +1,268 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Critical path and parallelism analysis of dispatched task graphs.
+
+The required tasks structure of the dispatched node is expanded into the
+units of work the farm will run: every jobtronaut task becomes a unit,
+HierarchyTasks only contribute their own required tasks, once per element if
+they are per element. Tuples chain their entries, lists run them side by side.
+Unknown jobtronaut tasks are assumed to have no required tasks of their own.
+"""
+
+import json
+
+from collections import (
+    OrderedDict,
+    namedtuple
+)
+
+from missioncontrol.dispatch.structure import (
+    List,
+    Tuple
+)
+
+TaskInfo = namedtuple("TaskInfo", ["required_tasks", "per_element"])
+Unit = namedtuple("Unit", ["index", "name", "element", "cost", "requires"])
+
+
+class JobGraph(object):
+    """ The units of work of a job and their dependencies
+
+    Args:
+        structure: the required tasks of the dispatched node
+        tasks (dict): the `TaskInfo` of every emitted HierarchyTask by name
+        costs (dict): estimated costs of the tasks by name, 1 by default
+        elements (int): the number of elements assumed for per element tasks
+
+    """
+    def __init__(self, structure, tasks, costs=None, elements=1):
+        self.tasks = tasks
+        self.costs = costs or {}
+        self.elements = max(1, elements)
+        self.units = []
+        self._expanding = []
+        self._add(structure, (), None)
+
+    def _unit(self, name, element, requires):
+        unit = Unit(len(self.units), name, element, float(self.costs.get(name, 1.0)), tuple(sorted(requires)))
+        self.units.append(unit)
+        return (unit.index,)
+
+    def _add(self, item, after, element):
+        """ Adds the units of a structure entry after the given units, returns the units it ends with """
+        if isinstance(item, Tuple):
+            for child in item:
+                after = self._add(child, after, element)
+            return after
+
+        if isinstance(item, List):
+            ends = set()
+            for child in item:
+                ends.update(self._add(child, after, element))
+            return tuple(ends) if item else after
+
+        info = self.tasks.get(item)
+        if info is None:
+            return self._unit(item, element, after)
+
+        if item in self._expanding:
+            raise ValueError("{} requires itself.".format(" -> ".join(self._expanding + [item])))
+
+        self._expanding.append(item)
+        try:
+            if info.per_element and element is None:
+                ends = set()
+                for index in range(self.elements):
+                    ends.update(self._add(info.required_tasks, after, index))
+                return tuple(ends) if ends else after
+            return self._add(info.required_tasks, after, element)
+        finally:
+            self._expanding.pop()
+
+    def levels(self):
+        """ Returns the level of every unit, the length of the longest chain of units leading to it """
+        levels = []
+        for unit in self.units:
+            # units are only ever added after the units they require
+            levels.append(1 + max([levels[index] for index in unit.requires] or [-1]))
+        return levels
+
+    def finish_times(self):
+        """ Returns the earliest finish time of every unit with unlimited resources """
+        finish = []
+        for unit in self.units:
+            finish.append(unit.cost + max([finish[index] for index in unit.requires] or [0.0]))
+        return finish
+
+    def critical_path(self):
+        """ Returns the units of the longest chain by cost, in execution order """
+        if not self.units:
+            return []
+
+        finish = self.finish_times()
+        unit = self.units[max(range(len(self.units)), key=lambda index: finish[index])]
+        path = [unit]
+        while unit.requires:
+            unit = self.units[max(unit.requires, key=lambda index: finish[index])]
+            path.append(unit)
+        return list(reversed(path))
+
+
+def _label(unit):
+    return unit.name if unit.element is None else "{}[{}]".format(unit.name, unit.element)
+
+
+def analyze(structure, tasks, costs=None, elements=1):
+    """ Analyzes the required tasks of a dispatched node
+
+    Returns:
+        OrderedDict: the report, see `format_report`
+
+    """
+    graph = JobGraph(structure, tasks, costs, elements)
+    levels = graph.levels()
+    widths = [0] * (max(levels) + 1 if levels else 0)
+    for level in levels:
+        widths[level] += 1
+
+    path = graph.critical_path()
+    critical_length = sum(unit.cost for unit in path)
+    total_cost = sum(unit.cost for unit in graph.units)
+
+    # units on the critical path that have the farm for themselves, no other unit runs while they do
+    finish = graph.finish_times()
+    start = [finish[unit.index] - unit.cost for unit in graph.units]
+    bottlenecks = sorted(
+        (unit for unit in path if not any(
+            other.index != unit.index and start[other.index] < finish[unit.index]
+            and finish[other.index] > start[unit.index]
+            for other in graph.units
+        )),
+        key=lambda unit: unit.cost, reverse=True
+    )
+
+    return OrderedDict([
+        ("units", len(graph.units)),
+        ("total_cost", total_cost),
+        ("critical_path_length", critical_length),
+        ("critical_path", [_label(unit) for unit in path]),
+        ("average_parallelism", total_cost / critical_length if critical_length else 0.0),
+        ("levels", len(widths)),
+        ("max_width", max(widths) if widths else 0),
+        ("average_width", float(len(graph.units)) / len(widths) if widths else 0.0),
+        ("widths", widths),
+        ("bottlenecks", [
+            OrderedDict([
+                ("task", _label(unit)), ("cost", unit.cost), ("start", start[unit.index]),
+                ("level", levels[unit.index])
+            ])
+            for unit in bottlenecks
+        ]),
+        ("per_element_tasks", sorted(name for name, info in tasks.items() if info.per_element)),
+        ("elements", graph.elements),
+        ("cost_weighted", bool(costs)),
+    ])
+
+
+def format_report(report):
+    lines = [
+        "Units of work:         {}".format(report["units"]),
+        "Critical path length:  {:g}{}".format(
+            report["critical_path_length"], "" if report["cost_weighted"] else " units"
+        ),
+        "Total work:            {:g}".format(report["total_cost"]),
+        "Average parallelism:   {:.2f}".format(report["average_parallelism"]),
+        "Levels:                {}".format(report["levels"]),
+        "Width:                 {} max, {:.2f} average".format(report["max_width"], report["average_width"]),
+    ]
+    if report["per_element_tasks"]:
+        lines.append("Per element tasks:     {} (assuming {} element(s))".format(
+            ", ".join(report["per_element_tasks"]), report["elements"]
+        ))
+
+    lines.append("")
+    lines.append("Critical path:")
+    lines.extend("    {}".format(name) for name in report["critical_path"])
+
+    if report["bottlenecks"]:
+        lines.append("")
+        lines.append("Serialisation bottlenecks, nothing else can run meanwhile:")
+        lines.extend(
+            "    {task} (cost {cost:g}, starting at {start:g}, level {level})".format(**bottleneck)
+            for bottleneck in report["bottlenecks"]
+        )
+    return "\n".join(lines)
+
+
+def write_report(report, filepath):
+    with open(filepath, "w") as fp:
+        json.dump(report, fp, indent=4)
+
+
+def load_costs(filepath):
+    """ Reads cost estimates from a JSON file mapping task names to costs, e.g. seconds """
+    if not filepath:
+        return {}
+    with open(filepath) as fp:
+        return dict((name, float(cost)) for name, cost in json.load(fp).items())
+
+
+def job_structure(startnode):
+    """ Returns the required tasks of the given node and the `TaskInfo` of all HierarchyTasks downstream of it """
+    from missioncontrol.dispatch.graph import cached_downstream_nodes
+    from missioncontrol.dispatch.naming import TaskNameIndex
+    from missioncontrol.dispatch.trixterdispatcher import JobtronautDispatcher
+    from missioncontrol.nodes import (
+        HierarchyTask,
+        JobtronautTask
+    )
+
+    scriptnode = startnode.scriptNode()
+    downstream = cached_downstream_nodes()
+    nodes = list(JobtronautDispatcher.get_hierarchy_nodes(
+        startnode, scriptnode, type_filter=(HierarchyTask, JobtronautTask), downstream=downstream
+    ))
+    names = TaskNameIndex(nodes)
+
+    tasks = dict(
+        (names.name(node), TaskInfo(
+            JobtronautDispatcher.get_required_tasks(node, scriptnode, names, downstream=downstream),
+            node.getChild("per_element").getValue()
+        ))
+        for node in nodes if isinstance(node, HierarchyTask)
+    )
+
+    if isinstance(startnode, HierarchyTask):
+        structure = List([names.name(startnode)])
+    else:
+        structure = JobtronautDispatcher.get_required_tasks(startnode, scriptnode, names, downstream=downstream)
+
+    return structure, tasks
+
+
+def from_graph(startnode, costs=None, elements=1):
+    """ Analyzes the graph downstream of the given node without dispatching it """
+    structure, tasks = job_structure(startnode)
+    return analyze(structure, tasks, costs, elements)
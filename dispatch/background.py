@@ -0,0 +1,121 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Dispatching in the background of the UI.
+
+Only the snapshot of the graph has to be taken on the UI thread, rendering,
+formatting and writing the taskfiles works on plain Python objects and runs
+on a worker thread. Observers, added by the UI, get told about every
+background dispatch when it starts and can follow its progress, cancel it and
+report its outcome. Without observers, in batch sessions, dispatches run in
+the foreground, so they are done before the process exits.
+"""
+
+import logging
+import sys
+import threading
+import traceback
+
+from jobtronaut.constants import LOGGING_NAMESPACE
+
+_LOG = logging.getLogger("{}.gaffer.dispatch".format(LOGGING_NAMESPACE))
+
+_OBSERVERS = []
+
+
+class Cancelled(Exception):
+    """ Raised by the work of a background dispatch once it got cancelled """
+
+
+def add_observer(observer):
+    """ Registers a callable which gets every `BackgroundDispatch` before it starts """
+    if observer not in _OBSERVERS:
+        _OBSERVERS.append(observer)
+
+
+def remove_observer(observer):
+    if observer in _OBSERVERS:
+        _OBSERVERS.remove(observer)
+
+
+def observed():
+    return bool(_OBSERVERS)
+
+
+def ui_session():
+    """ Whether this process runs the UI, its threads make forking the process unsafe """
+    return "GafferUI" in sys.modules
+
+
+class BackgroundDispatch(object):
+    """ Runs the work of a dispatch on a worker thread
+
+    Args:
+        label (str): what is dispatched, for the user
+        work (callable): called with a progress callable, taking the number
+            of done and total steps and a label, and the cancellation event
+
+    The callables in `progressed` and `finished` are called from the worker
+    thread, `finished` with the dispatch and the error message, which is None
+    on success.
+    """
+    def __init__(self, label, work):
+        self.label = label
+        self.progressed = []
+        self.finished = []
+        self.cancelled = threading.Event()
+        self.error = None
+        self._work = work
+        self._thread = threading.Thread(target=self._run, name="missioncontrol-dispatch")
+        self._thread.daemon = True
+
+    def start(self):
+        for observer in _OBSERVERS:
+            observer(self)
+        self._thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+
+    def _progress(self, done, total, label):
+        for callback in self.progressed:
+            callback(done, total, label)
+
+    def _run(self):
+        try:
+            self._work(self._progress, self.cancelled)
+        except Cancelled:
+            self.error = "Cancelled."
+            _LOG.info("Dispatch of {} cancelled.".format(self.label))
+        except Exception:
+            self.error = traceback.format_exc()
+            _LOG.error("Dispatch of {} failed:\n{}".format(self.label, self.error))
+        else:
+            _LOG.info("Dispatched {}.".format(self.label))
+
+        for callback in self.finished:
+            callback(self, self.error)
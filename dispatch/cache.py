@@ -0,0 +1,149 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Reuse of the formatted taskfiles of unchanged graphs.
+
+Formatting the taskfiles with autopep8 takes most of the time of a dispatch.
+The rendered, not yet formatted code of a taskfile is the key, together with
+the version of the taskfile format and of autopep8, so everything that ends
+up in a taskfile is covered: the values of expressions and of evaluated plug
+strings are part of it as they were rendered. The formatted taskfiles are
+stored under that key. Once the store exceeds its size, the least recently
+used entries are removed.
+
+The store is per user, see `default_directory`, nobody gets taskfiles
+written by somebody else back.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+from jobtronaut.constants import LOGGING_NAMESPACE
+
+_LOG = logging.getLogger("{}.gaffer.dispatch".format(LOGGING_NAMESPACE))
+
+# increase whenever the rendering of taskfiles changes
+FORMAT_VERSION = 7
+
+_EXTENSION = ".json"
+
+
+def default_directory():
+    """ Returns the location of the cache, which can be set by `MISSIONCONTROL_DISPATCH_CACHE` """
+    return os.getenv("MISSIONCONTROL_DISPATCH_CACHE") or os.path.expanduser("~/.missioncontrol/dispatch_cache")
+
+
+def _autopep8_version():
+    try:
+        import autopep8
+    except ImportError:
+        return None
+    return autopep8.__version__
+
+
+def taskfile_key(code):
+    """ Returns the hash of the rendered code of a taskfile and everything its formatting depends on """
+    if not isinstance(code, bytes):
+        code = code.encode("utf-8")
+    digest = hashlib.sha1("{} {}\n".format(FORMAT_VERSION, _autopep8_version()).encode("utf-8"))
+    digest.update(code)
+    return digest.hexdigest()
+
+
+class TaskfileCache(object):
+    """ A content addressed store of formatted taskfiles
+
+    Args:
+        directory (str): where the entries are stored, created on demand
+        max_size (int): bytes the entries may take up in total
+
+    """
+    def __init__(self, directory, max_size=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + _EXTENSION)
+
+    def get(self, key):
+        """ Returns the formatted taskfile stored under the key, None if there is none """
+        filepath = self.path(key)
+        try:
+            with open(filepath) as fp:
+                entry = json.load(fp)
+        except (IOError, OSError, ValueError):
+            return None
+        if entry.get("version") != FORMAT_VERSION:
+            return None
+
+        try:
+            # the modification time orders the entries for the eviction
+            os.utime(filepath, None)
+        except OSError:
+            pass
+        return entry["taskfile"]
+
+    def put(self, key, taskfile):
+        """ Stores a formatted taskfile under the key of its rendered code, see `evict` for the size limit """
+        filepath = self.path(key)
+        try:
+            directory = os.path.dirname(filepath)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            temporary = "{}.{}".format(filepath, os.getpid())
+            with open(temporary, "w") as fp:
+                json.dump({"version": FORMAT_VERSION, "taskfile": taskfile}, fp)
+            os.rename(temporary, filepath)
+        except (IOError, OSError):
+            _LOG.warning("Failed to store the taskfile in {}.".format(filepath), exc_info=True)
+
+    def entries(self):
+        """ Returns the (modification time, size, path) of all entries, the least recently used first """
+        entries = []
+        for root, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if not filename.endswith(_EXTENSION):
+                    continue
+                filepath = os.path.join(root, filename)
+                try:
+                    stat = os.stat(filepath)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, filepath))
+        return sorted(entries)
+
+    def evict(self):
+        """ Removes the least recently used entries until the store fits its size """
+        entries = self.entries()
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, filepath in entries:
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(filepath)
+            except OSError:
+                continue
+            size -= entry_size
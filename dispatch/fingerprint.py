@@ -0,0 +1,174 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Content hashes of task graphs.
+
+A fingerprint covers everything that ends up in a taskfile: the types, names
+and positions of the nodes, their plug values and connections. Task graphs
+are followed downstream, processor chains and argument connections upstream.
+Comparing the fingerprints of two versions of a script tells which Roots
+changed and which nodes were added, removed or edited in between.
+"""
+
+import hashlib
+
+from collections import namedtuple
+
+import Gaffer
+import GafferDispatch
+
+from missioncontrol.dispatch.graph import (
+    connected_nodes,
+    downstream_nodes,
+    node_position
+)
+
+GraphDiff = namedtuple("GraphDiff", ["added", "removed", "changed"])
+
+
+def _plug_records(node, scriptnode):
+    records = []
+    stack = list(node.children(Gaffer.Plug))
+    while stack:
+        plug = stack.pop(0)
+        name = plug.relativeName(node)
+        source = plug.getInput()
+        if source is not None:
+            source_node = source.node()
+            records.append("{}<-{}".format(name, source.relativeName(scriptnode) if source_node else source.getName()))
+        elif plug.direction() == Gaffer.Plug.Direction.In and isinstance(plug, Gaffer.ValuePlug) \
+                and not plug.children():
+            try:
+                records.append("{}={!r}".format(name, plug.getValue()))
+            except Exception:
+                # some plugs can't be evaluated outside of a proper context, their defaults are good enough
+                records.append("{}={!r}".format(name, plug.defaultValue()))
+        stack.extend(plug.children(Gaffer.Plug))
+    return records
+
+
+def node_fingerprint(node, scriptnode):
+    """ Returns the hash of a single node, ignoring the nodes it's connected to """
+    position = node_position(node)
+    content = "\n".join(
+        [node.typeName(), node.relativeName(scriptnode), "{:g} {:g}".format(position.x, position.y)]
+        + _plug_records(node, scriptnode)
+    )
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def compound_fingerprint(compound):
+    """ Returns the hash of the contents of a Box or Reference, independent of its name and location
+
+    Instances of the same compound have the same fingerprint as long as
+    nothing inside of them got edited, the values of their promoted plugs may
+    differ.
+    """
+    records = []
+    stack = list(compound.children(Gaffer.Node))
+    while stack:
+        node = stack.pop(0)
+        records.append((node.relativeName(compound), node_fingerprint(node, compound)))
+        stack.extend(node.children(Gaffer.Node))
+
+    digest = hashlib.sha1(compound.typeName().encode("utf-8"))
+    for key, fingerprint in sorted(records):
+        digest.update("{} {}\n".format(key, fingerprint).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def upstream_nodes(node):
+    """ Returns the nodes connected to any input of the given node, except for task inputs """
+    nodes = []
+    stack = list(node.children(Gaffer.Plug))
+    while stack:
+        plug = stack.pop(0)
+        source = plug.getInput()
+        if source is not None and source.node() is not None and not isinstance(plug, GafferDispatch.TaskNode.TaskPlug):
+            if not source.node().isSame(node):
+                nodes.append(source.node())
+        stack.extend(plug.children(Gaffer.Plug))
+    return nodes
+
+
+def graph_nodes(startnode, downstream=downstream_nodes):
+    """ Returns all nodes that contribute to the taskfile of the given node """
+    nodes = [startnode] + connected_nodes(startnode, downstream)
+    seen = set(node.fullName() for node in nodes)
+    index = 0
+    while index < len(nodes):
+        for upstream in upstream_nodes(nodes[index]):
+            if upstream.fullName() not in seen:
+                seen.add(upstream.fullName())
+                nodes.append(upstream)
+        index += 1
+    return nodes
+
+
+class Fingerprints(object):
+    """ Fingerprints of nodes and task graphs of one state of a script
+
+    Node fingerprints are computed once per instance, graphs sharing nodes
+    share the work.
+    """
+    def __init__(self, scriptnode, downstream=downstream_nodes):
+        self.scriptnode = scriptnode
+        self.nodes = {}
+        self._downstream = downstream
+
+    def node(self, node):
+        key = node.relativeName(self.scriptnode)
+        try:
+            return self.nodes[key]
+        except KeyError:
+            fingerprint = self.nodes[key] = node_fingerprint(node, self.scriptnode)
+            return fingerprint
+
+    def graph(self, startnode):
+        """ Returns the hash of everything that contributes to the taskfile of the given node """
+        digest = hashlib.sha1()
+        for key, fingerprint in sorted(
+                (node.relativeName(self.scriptnode), self.node(node))
+                for node in graph_nodes(startnode, self._downstream)
+        ):
+            digest.update("{} {}\n".format(key, fingerprint).encode("utf-8"))
+        return digest.hexdigest()
+
+
+def diff(previous, current):
+    """ Compares the node fingerprints of two states of a script
+
+    Args:
+        previous (dict): node names mapped to fingerprints
+        current (dict): node names mapped to fingerprints
+
+    Returns:
+        GraphDiff: the sorted names of added, removed and changed nodes
+
+    """
+    return GraphDiff(
+        sorted(set(current) - set(previous)),
+        sorted(set(previous) - set(current)),
+        sorted(name for name in set(current) & set(previous) if current[name] != previous[name]),
+    )
@@ -0,0 +1,123 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Helpers to traverse task graphs through their plug connections.
+
+Unlike `GafferUI.GraphGadget` these don't need a UI, so they can be used in
+headless processes as well.
+"""
+
+import imath
+
+import Gaffer
+
+
+def output_plugs(node):
+    """ Yields all output plugs of the given node, including nested ones """
+    stack = list(node.children(Gaffer.Plug))
+    while stack:
+        plug = stack.pop(0)
+        if plug.direction() == Gaffer.Plug.Direction.Out:
+            yield plug
+        stack.extend(plug.children(Gaffer.Plug))
+
+
+def destination_plugs(plug):
+    """ Yields the plugs the given plug is connected to
+
+    Plugs promoted to a Box or Reference only pass connections on, those are
+    followed into the compound, or out of it, up to the plugs of the nodes
+    receiving them.
+    """
+    queue = list(plug.outputs())
+    while queue:
+        output = queue.pop(0)
+        if isinstance(output.node(), Gaffer.SubGraph) and output.outputs():
+            queue.extend(output.outputs())
+        else:
+            yield output
+
+
+def downstream_nodes(node):
+    """ Returns the nodes directly connected to any output of the given node
+
+    Each node is contained once, in the order of their connections. Boxes and
+    References are looked through, see `destination_plugs`.
+    """
+    nodes = []
+    seen = set()
+    for plug in output_plugs(node):
+        for output in destination_plugs(plug):
+            downstream = output.node()
+            if downstream is None or downstream.isSame(node):
+                continue
+            key = downstream.fullName()
+            if key not in seen:
+                seen.add(key)
+                nodes.append(downstream)
+    return nodes
+
+
+def node_position(node):
+    """ Returns the position of the node in the GraphEditor """
+    position = Gaffer.Metadata.value(node, "__uiPosition")
+    return position if position is not None else imath.V2f(0)
+
+
+def cached_downstream_nodes():
+    """ Returns a version of `downstream_nodes` that remembers its results
+
+    Traversals sharing it only look at the connections of every node once,
+    which pays off when several start nodes share parts of their graphs.
+    """
+    cache = {}
+
+    def _downstream_nodes(node):
+        key = node.fullName()
+        try:
+            return cache[key]
+        except KeyError:
+            nodes = cache[key] = downstream_nodes(node)
+            return nodes
+
+    return _downstream_nodes
+
+
+def connected_nodes(node, downstream=downstream_nodes):
+    """ Returns all nodes reachable through the outputs of the given node
+
+    The nodes are collected breadth first, each node is contained once and
+    the start node itself is not.
+    """
+    nodes = []
+    seen = set([node.fullName()])
+    queue = [node]
+    while queue:
+        for child in downstream(queue.pop(0)):
+            key = child.fullName()
+            if key not in seen:
+                seen.add(key)
+                nodes.append(child)
+                queue.append(child)
+    return nodes
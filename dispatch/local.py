@@ -0,0 +1,282 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Local execution of dispatched jobs.
+
+GafferDispatch's Local dispatcher is deregistered, it doesn't know about the
+structure of jobtronaut Tasks. The JobtronautLocalDispatcher writes the
+taskfile like the JobtronautDispatcher and runs the job on this machine
+afterwards: the entries of Tuples one after another, the entries of Lists side
+by side and per element tasks once per element, see `analysis.JobGraph`.
+
+Every unit of work runs the `command` of the dispatcher, in which "{task}",
+"{element}" and "{taskfile}" are replaced. The dispatcher refuses to dispatch
+without a command, `LocalExecutor` can still be used with a callable doing
+nothing to measure the overhead of the structure itself.
+"""
+
+import functools
+import logging
+import multiprocessing
+import subprocess
+import threading
+import traceback
+
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+from timeit import default_timer
+
+try:
+    from Queue import Queue
+except ImportError:
+    from queue import Queue
+
+import IECore
+
+import Gaffer
+
+from jobtronaut.constants import LOGGING_NAMESPACE
+
+from missioncontrol.dispatch.analysis import (
+    JobGraph,
+    job_structure,
+    load_costs
+)
+from missioncontrol.dispatch import background
+from missioncontrol.dispatch.trixterdispatcher import (
+    JobtronautDispatcher,
+    taskfile_path
+)
+
+_LOG = logging.getLogger("{}.gaffer.dispatch".format(LOGGING_NAMESPACE))
+
+THREADS = "threads"
+PROCESSES = "processes"
+
+Progress = namedtuple("Progress", ["done", "total", "running", "label", "duration", "error"])
+
+
+class ExecutionError(RuntimeError):
+    """ Raised if units of work failed, holds the label and traceback of each of them """
+    def __init__(self, failures):
+        super(ExecutionError, self).__init__("{} task(s) failed: {}".format(
+            len(failures), ", ".join(label for label, _ in failures)
+        ))
+        self.failures = failures
+
+
+def label(unit):
+    return unit.name if unit.element is None else "{}[{}]".format(unit.name, unit.element)
+
+
+def log_progress(progress):
+    if progress.error:
+        _LOG.error("[{}/{}] {} failed after {:.2f}s:\n{}".format(
+            progress.done, progress.total, progress.label, progress.duration, progress.error
+        ))
+    else:
+        _LOG.info("[{}/{}] {} finished in {:.2f}s, {} running.".format(
+            progress.done, progress.total, progress.label, progress.duration, progress.running
+        ))
+
+
+def run_command(command, taskfile, name, element):
+    """ Runs the command of a unit of work, raises if it fails """
+    if not command:
+        return
+    subprocess.check_call(
+        command.format(task=name, element="" if element is None else element, taskfile=taskfile), shell=True
+    )
+
+
+def _execute(run, index, name, element):
+    # runs in the pool, errors are handed back instead of raised so all results reach the scheduler
+    start = default_timer()
+    try:
+        run(name, element)
+    except Exception:
+        return index, default_timer() - start, traceback.format_exc()
+    return index, default_timer() - start, None
+
+
+class LocalExecutor(object):
+    """ Runs the units of work of a job as soon as the units they require are done
+
+    Args:
+        graph (JobGraph): the job
+        run (callable): called with the task name and element (None for
+            units that aren't per element) of every unit, has to be picklable
+            for process pools
+        workers (int): the number of units running at the same time, 0 uses
+            one per CPU
+        pool (str): `THREADS` or `PROCESSES`
+        progress (callable): called with a `Progress` whenever a unit finished
+        cancelled (threading.Event): stops starting units once it is set
+
+    """
+    def __init__(self, graph, run, workers=0, pool=THREADS, progress=log_progress, cancelled=None):
+        self.graph = graph
+        self.run_unit = run
+        self.workers = workers or multiprocessing.cpu_count()
+        self.pool = pool
+        self.progress = progress
+        self.durations = {}
+        self.cancelled = cancelled or threading.Event()
+
+    def cancel(self):
+        """ Stops starting units, the running ones are waited for """
+        self.cancelled.set()
+
+    def run(self):
+        """ Runs the job, returns the wall time
+
+        Raises:
+            ExecutionError: if units failed, nothing that requires them is started
+        """
+        units = self.graph.units
+        dependents = [[] for _ in units]
+        waiting = [len(unit.requires) for unit in units]
+        for unit in units:
+            for index in unit.requires:
+                dependents[index].append(unit.index)
+
+        results = Queue()
+        failures = []
+        running = set()
+        pool = (multiprocessing.Pool if self.pool == PROCESSES else ThreadPool)(self.workers)
+
+        def _start(unit):
+            running.add(unit.index)
+            pool.apply_async(
+                _execute, (self.run_unit, unit.index, unit.name, unit.element),
+                callback=results.put
+            )
+
+        start = default_timer()
+        try:
+            for unit in units:
+                if not unit.requires:
+                    _start(unit)
+
+            while running:
+                index, duration, error = results.get()
+                running.discard(index)
+                self.durations[index] = duration
+                if error:
+                    failures.append((label(units[index]), error))
+                else:
+                    for dependent in dependents[index]:
+                        waiting[dependent] -= 1
+                        if waiting[dependent] == 0 and not failures and not self.cancelled.is_set():
+                            _start(units[dependent])
+
+                if self.progress:
+                    self.progress(Progress(
+                        len(self.durations), len(units), len(running), label(units[index]), duration, error
+                    ))
+        finally:
+            pool.close()
+            pool.join()
+
+        if failures:
+            raise ExecutionError(failures)
+        return default_timer() - start
+
+
+class JobtronautLocalDispatcher(JobtronautDispatcher):
+    """ Writes the taskfile and runs the job on this machine """
+    def __init__(self, name="JobtronautLocal"):
+        super(JobtronautLocalDispatcher, self).__init__(name)
+
+        command_plug = Gaffer.StringPlug("command", Gaffer.Plug.Direction.In)
+        Gaffer.Metadata.registerPlugValue(
+            command_plug, "description",
+            "The command running a single task, \"{task}\", \"{element}\" and \"{taskfile}\" are replaced. "
+            "Required, nothing is dispatched without it."
+        )
+        workers_plug = Gaffer.IntPlug("workers", Gaffer.Plug.Direction.In, defaultValue=0, minValue=0)
+        Gaffer.Metadata.registerPlugValue(
+            workers_plug, "description", "The number of tasks running at the same time. 0 runs one per CPU."
+        )
+        pool_plug = Gaffer.StringPlug("pool", Gaffer.Plug.Direction.In, defaultValue=THREADS)
+        Gaffer.Metadata.registerPlugValue(pool_plug, "plugValueWidget:type", "GafferUI.PresetsPlugValueWidget")
+        Gaffer.Metadata.registerPlugValue(pool_plug, "presetNames", IECore.StringVectorData(["Threads", "Processes"]))
+        Gaffer.Metadata.registerPlugValue(pool_plug, "presetValues", IECore.StringVectorData([THREADS, PROCESSES]))
+        Gaffer.Metadata.registerPlugValue(
+            pool_plug, "description",
+            "Runs the commands from threads or from worker processes of this process. "
+            "Dispatches from the UI always use threads."
+        )
+        for plug in (command_plug, workers_plug, pool_plug):
+            Gaffer.Metadata.registerPlugValue(plug, "nodule:type", "")
+            Gaffer.Metadata.registerPlugValue(plug, "layout:section", "Local Execution")
+            self.addChild(plug)
+
+    def _work(self, nodes, write):
+        command = self.getChild("command").getValue()
+        if not command:
+            # running nothing would still be reported as a finished run
+            raise ValueError("{} has no command to run the tasks with.".format(self.getName()))
+
+        write = super(JobtronautLocalDispatcher, self)._work(nodes, write)
+
+        scriptnode = nodes[0].scriptNode()
+        filepath = self.getChild("taskfile").getValue()
+        costs = load_costs(self.getChild("cost_estimates").getValue())
+        workers = self.getChild("workers").getValue()
+        pool = self.getChild("pool").getValue()
+        if pool == PROCESSES and background.ui_session():
+            # forking the multithreaded UI process isn't safe, the commands are subprocesses anyway
+            _LOG.warning("Running the tasks from threads, worker processes aren't used in the UI.")
+            pool = THREADS
+
+        # the graph is read here, the jobs may run in the background of the UI
+        jobs = []
+        for node in nodes:
+            structure, tasks = job_structure(node)
+            jobs.append((
+                node.relativeName(scriptnode),
+                JobGraph(structure, tasks, costs, self.getChild("elements").getValue()),
+                taskfile_path(filepath, node, scriptnode) if len(nodes) > 1 else filepath
+            ))
+
+        def _work(progress, cancelled):
+            write(progress, cancelled)
+
+            def _progress(state):
+                log_progress(state)
+                if progress:
+                    progress(state.done, state.total, state.label)
+
+            for label, graph, taskfile in jobs:
+                executor = LocalExecutor(
+                    graph, functools.partial(run_command, command, taskfile), workers, pool, _progress, cancelled
+                )
+                _LOG.info("Running {} task(s) of {} locally.".format(len(graph.units), label))
+                duration = executor.run()
+                if executor.cancelled.is_set():
+                    raise background.Cancelled()
+                _LOG.info("Ran {} in {:.2f}s.".format(label, duration))
+
+        return _work
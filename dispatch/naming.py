@@ -0,0 +1,119 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Unique identifiers for the Tasks emitted into a taskfile.
+
+HierarchyTask nodes become Task classes, so their names have to be valid and
+unique Python identifiers. Node names are only unique per parent though, so
+nodes inside Boxes or References can share names with other nodes. The index
+is built once per dispatch and resolves every node to its emitted identifier.
+"""
+
+import keyword
+import re
+
+from missioncontrol.nodes import (
+    HierarchyTask,
+    JobtronautTask
+)
+
+_INVALID_CHARACTERS = re.compile(r"[^A-Za-z0-9_]")
+
+# imported by every taskfile
+IMPORTED_NAMES = ("Task", "ProcessorDefinition")
+
+# the dispatcher emits definitions named after these prefixes and a number next to the Tasks
+PROCESSOR_PREFIX = "_PROCESSOR_"
+SHARED_TASK_PREFIX = "_SharedTask"
+_GENERATED = re.compile(r"^({}|{})\d+$".format(PROCESSOR_PREFIX, SHARED_TASK_PREFIX))
+
+
+def sanitize(name):
+    """ Turns the given name into a valid Python identifier """
+    name = _INVALID_CHARACTERS.sub("_", name) or "_"
+    if name[0].isdigit():
+        name = "_" + name
+    if keyword.iskeyword(name):
+        name += "_"
+    return name
+
+
+def _plugin_name(node):
+    return node.getChild("type").getValue()
+
+
+class TaskNameIndex(object):
+    """ Maps task nodes to the identifiers used in the taskfile
+
+    JobtronautTask nodes are referenced by the name of their jobtronaut task.
+    HierarchyTask nodes keep their (sanitized) name if possible. Clashes with
+    other HierarchyTasks, referenced jobtronaut tasks, the names the taskfile
+    imports or the names of generated definitions are resolved by adding a
+    numeric suffix. The nodes closest to the script root are named first,
+    ties are broken by their path, so the result is deterministic.
+    """
+    def __init__(self, nodes):
+        self._names = {}
+        self.renamed = []
+
+        hierarchy_nodes = []
+        taken = set(IMPORTED_NAMES)
+        suffixes = {}
+        for node in nodes:
+            if isinstance(node, JobtronautTask):
+                self._names[node.fullName()] = _plugin_name(node)
+                taken.add(_plugin_name(node))
+            elif isinstance(node, HierarchyTask):
+                hierarchy_nodes.append(node)
+
+        hierarchy_nodes.sort(key=lambda node: (node.fullName().count("."), node.fullName()))
+        for node in hierarchy_nodes:
+            base = sanitize(node.getName())
+            name = base
+            while name in taken or _GENERATED.match(name):
+                # continue where the last clash of the same name stopped
+                suffixes[base] = suffixes.get(base, 0) + 1
+                name = "{}_{}".format(base, suffixes[base])
+            taken.add(name)
+            self._names[node.fullName()] = name
+            if name != node.getName():
+                self.renamed.append((node, name))
+
+    def __contains__(self, node):
+        return node.fullName() in self._names
+
+    def __len__(self):
+        return len(self._names)
+
+    def name(self, node):
+        """ Returns the identifier of the given node
+
+        Nodes that are not part of the index fall back to their own name.
+        """
+        try:
+            return self._names[node.fullName()]
+        except KeyError:
+            if isinstance(node, JobtronautTask):
+                return _plugin_name(node)
+            return sanitize(node.getName())
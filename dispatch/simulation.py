@@ -0,0 +1,281 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Discrete-event simulation of jobs on the farm.
+
+The units of work of a job, see `analysis.JobGraph`, are played out on a
+number of virtual blades. A unit is queued as soon as all units it requires
+are done and runs for its estimated cost on the next free blade. The queue is
+served first come first served like the farm does, or by the longest remaining
+chain of work to see what a smarter scheduler would gain.
+
+Taskfiles are read without executing them, so their plugins don't have to be
+available::
+
+    gaffer env python -m missioncontrol.dispatch.simulation /tmp/temptasks.py --blades 10 20 --costs costs.json
+"""
+
+import argparse
+import ast
+import heapq
+import json
+import sys
+
+from collections import OrderedDict
+
+from missioncontrol.dispatch.analysis import (
+    JobGraph,
+    TaskInfo,
+    load_costs
+)
+from missioncontrol.dispatch.structure import (
+    List,
+    Tuple
+)
+
+FIFO = "fifo"
+CRITICAL_PATH = "critical_path"
+
+
+def _remaining(graph):
+    """ Returns the longest chain of work starting with every unit """
+    dependents = [[] for _ in graph.units]
+    for unit in graph.units:
+        for index in unit.requires:
+            dependents[index].append(unit.index)
+
+    remaining = [0.0] * len(graph.units)
+    for unit in reversed(graph.units):
+        remaining[unit.index] = unit.cost + max([remaining[index] for index in dependents[unit.index]] or [0.0])
+    return remaining, dependents
+
+
+def simulate(graph, blades, policy=FIFO):
+    """ Plays out a job on the given number of blades
+
+    Returns:
+        list: the (time, busy blades, queued units) after every change, the
+            input of `report`
+
+    """
+    remaining, dependents = _remaining(graph)
+    waiting = [len(unit.requires) for unit in graph.units]
+    queue = []
+    running = []
+    samples = []
+    sequence = [0]
+
+    def _queue(index, time):
+        # ties are broken by the order the units were queued in
+        sequence[0] += 1
+        key = time if policy == FIFO else -remaining[index]
+        heapq.heappush(queue, (key, sequence[0], index))
+
+    for unit in graph.units:
+        if not unit.requires:
+            _queue(unit.index, 0.0)
+
+    time = 0.0
+    while queue or running:
+        while queue and len(running) < blades:
+            index = heapq.heappop(queue)[2]
+            heapq.heappush(running, (time + graph.units[index].cost, index))
+        samples.append((time, len(running), len(queue)))
+
+        time, index = heapq.heappop(running)
+        finished = [index]
+        # everything finishing at the same time frees its blade at once
+        while running and running[0][0] == time:
+            finished.append(heapq.heappop(running)[1])
+
+        for index in finished:
+            for dependent in dependents[index]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    _queue(dependent, time)
+
+    samples.append((time, 0, 0))
+    return samples
+
+
+def _integral(samples, column, start, end):
+    """ Returns the integral of a column of the step function described by the samples between start and end """
+    total = 0.0
+    for (time, busy, queued), (next_time, _, _) in zip(samples, samples[1:]):
+        lower, upper = max(time, start), min(next_time, end)
+        if upper > lower:
+            total += (busy, queued)[column] * (upper - lower)
+    return total
+
+
+def report(graph, blades, policy=FIFO, buckets=20):
+    """ Simulates a job and summarises the result
+
+    Returns:
+        OrderedDict: makespan, utilisation and queue depth, overall and per
+            time bucket
+
+    """
+    blades = max(1, blades)
+    samples = simulate(graph, blades, policy)
+    makespan = samples[-1][0]
+    work = sum(unit.cost for unit in graph.units)
+
+    bucket_size = makespan / buckets if makespan else 0.0
+    bounds = [(bucket * bucket_size, (bucket + 1) * bucket_size) for bucket in range(buckets)] if makespan else []
+
+    return OrderedDict([
+        ("units", len(graph.units)),
+        ("blades", blades),
+        ("policy", policy),
+        ("makespan", makespan),
+        ("total_work", work),
+        ("utilisation", work / (makespan * blades) if makespan else 0.0),
+        ("max_queue_depth", max(queued for _, _, queued in samples)),
+        ("average_queue_depth", _integral(samples, 1, 0.0, makespan) / makespan if makespan else 0.0),
+        ("bucket_size", bucket_size),
+        ("utilisation_over_time", [
+            _integral(samples, 0, start, end) / (bucket_size * blades) for start, end in bounds
+        ]),
+        ("queue_depth_over_time", [
+            _integral(samples, 1, start, end) / bucket_size for start, end in bounds
+        ]),
+        ("samples", samples),
+    ])
+
+
+def format_report(result):
+    lines = [
+        "Units of work:        {}".format(result["units"]),
+        "Blades:               {} ({})".format(result["blades"], result["policy"]),
+        "Makespan:             {:g}".format(result["makespan"]),
+        "Utilisation:          {:.1%}".format(result["utilisation"]),
+        "Queue depth:          {} max, {:.2f} average".format(
+            result["max_queue_depth"], result["average_queue_depth"]
+        ),
+        "",
+        "Over time, {:g} per row:".format(result["bucket_size"]),
+    ]
+    for utilisation, queued in zip(result["utilisation_over_time"], result["queue_depth_over_time"]):
+        lines.append("    {:<20} {:>6.1%} busy {:>8.1f} queued".format(
+            "#" * int(round(utilisation * 20)), utilisation, queued
+        ))
+    return "\n".join(lines)
+
+
+def _structure(node):
+    if isinstance(node, ast.List):
+        return List(_structure(child) for child in node.elts)
+    if isinstance(node, ast.Tuple):
+        return Tuple(_structure(child) for child in node.elts)
+    return ast.literal_eval(node)
+
+
+def load_taskfile(filepath):
+    """ Reads the Tasks of a taskfile without executing it
+
+    Attributes inherited from other classes of the taskfile, like the shared
+    definitions of compound instances, are taken into account. Only classes
+    deriving from Task are Tasks.
+
+    Returns:
+        tuple: the required tasks of the job, which are all Tasks no other Task
+            requires, and the `TaskInfo` of every Task by name
+    """
+    with open(filepath) as fp:
+        module = ast.parse(fp.read(), filepath)
+
+    classes = OrderedDict()
+    for definition in module.body:
+        if not isinstance(definition, ast.ClassDef):
+            continue
+        attributes = {}
+        for statement in definition.body:
+            if isinstance(statement, ast.Assign) and isinstance(statement.targets[0], ast.Name):
+                attributes[statement.targets[0].id] = statement.value
+        bases = [base.id for base in definition.bases if isinstance(base, ast.Name)]
+        classes[definition.name] = (bases, attributes)
+
+    def _attribute(name, attribute):
+        bases, attributes = classes[name]
+        if attribute in attributes:
+            return attributes[attribute]
+        for base in bases:
+            if base in classes:
+                value = _attribute(base, attribute)
+                if value is not None:
+                    return value
+        return None
+
+    def _is_task(name):
+        return any(base == "Task" or (base in classes and _is_task(base)) for base in classes[name][0])
+
+    tasks = OrderedDict()
+    for name in classes:
+        if not _is_task(name):
+            continue
+        required_tasks = _attribute(name, "required_tasks")
+        flags = _attribute(name, "flags")
+        tasks[name] = TaskInfo(
+            List() if required_tasks is None else _structure(required_tasks),
+            flags is not None and "PER_ELEMENT" in ast.dump(flags)
+        )
+
+    def _names(item):
+        if isinstance(item, (List, Tuple)):
+            return set().union(*[_names(child) for child in item]) if item else set()
+        return {item}
+
+    required = set().union(*[_names(info.required_tasks) for info in tasks.values()]) if tasks else set()
+    return List(name for name in tasks if name not in required), tasks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulates a dispatched taskfile on the farm.")
+    parser.add_argument("taskfile")
+    parser.add_argument("--blades", type=int, nargs="+", default=[10])
+    parser.add_argument("--costs", help="JSON file mapping task names to estimated durations")
+    parser.add_argument("--elements", type=int, default=1, help="Elements assumed for per element tasks")
+    parser.add_argument("--policy", choices=(FIFO, CRITICAL_PATH), default=FIFO)
+    parser.add_argument("--output", help="Writes the results as JSON")
+    args = parser.parse_args(argv)
+
+    structure, tasks = load_taskfile(args.taskfile)
+    graph = JobGraph(structure, tasks, load_costs(args.costs), args.elements)
+
+    results = []
+    for blades in args.blades:
+        result = report(graph, blades, args.policy)
+        print(format_report(result))
+        print("")
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" The structure of the required tasks of a Task.
+
+Required tasks are nested lists and tuples of task names. The entries of a
+list run in parallel, the entries of a tuple one after another. The graph
+maps to it directly, Parallel nodes and Dots become lists and Serial nodes
+tuples, which results in a lot of redundant nesting. `normalize` removes it
+without changing what runs when.
+"""
+
+
+class List(list):
+    """ Required tasks that run in parallel """
+
+
+class Tuple(tuple):
+    """ Required tasks that run one after another """
+
+
+def _key(item):
+    if isinstance(item, Tuple):
+        return ("serial",) + tuple(_key(child) for child in item)
+    if isinstance(item, List):
+        return ("parallel",) + tuple(_key(child) for child in item)
+    return item
+
+
+def _normalize_group(group):
+    kind = type(group)
+    children = []
+    keys = set()
+    for child in group:
+        child = normalize(child)
+        if isinstance(child, (List, Tuple)):
+            if not child:
+                # an empty group doesn't require anything
+                continue
+            if type(child) is kind:
+                # associative, (a, (b, c)) runs the same as (a, b, c)
+                children.extend(child)
+                continue
+        children.append(child)
+
+    if kind is List:
+        # running the same task twice at the same time doesn't add anything
+        unique = []
+        for child in children:
+            key = _key(child)
+            if key not in keys:
+                keys.add(key)
+                unique.append(child)
+        children = unique
+    # repetitions in serial groups are kept, distinct nodes of the same jobtronaut task share their name
+
+    if len(children) == 1:
+        # a group of a single entry runs the same as the entry itself
+        return children[0]
+    return kind(children)
+
+
+def normalize(item):
+    """ Returns the minimal equivalent of the given required tasks structure
+
+    Groups nested in groups of the same kind are flattened, empty groups are
+    dropped, groups of a single entry are replaced by the entry and repeated
+    entries of parallel groups are removed.
+    """
+    if isinstance(item, (List, Tuple)):
+        return _normalize_group(item)
+    return item
@@ -22,22 +22,68 @@
 #  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
 # ######################################################################################################################
 
+import functools
+import io
+import logging
+import multiprocessing
 import re
 import os
-import sys
 import textwrap
 
-try:
-    import autopep8
-except ImportError:
-    autopep8 = None
+from collections import (
+    OrderedDict,
+    namedtuple
+)
 
 import IECore
 
 import Gaffer
-import GafferUI
 import GafferDispatch
 
+from jobtronaut.constants import LOGGING_NAMESPACE
+
+from missioncontrol.profiling import (
+    PhaseTimer,
+    ProfileCapture,
+    sidecar_path
+)
+from missioncontrol.dispatch import background
+from missioncontrol.dispatch.analysis import (
+    TaskInfo,
+    analyze,
+    format_report,
+    load_costs,
+    write_report
+)
+from missioncontrol.dispatch.cache import (
+    TaskfileCache,
+    default_directory,
+    taskfile_key
+)
+from missioncontrol.dispatch.fingerprint import compound_fingerprint
+from missioncontrol.dispatch.graph import (
+    cached_downstream_nodes,
+    connected_nodes,
+    downstream_nodes,
+    node_position
+)
+from missioncontrol.dispatch.structure import (
+    List,
+    Tuple,
+    normalize
+)
+from missioncontrol.dispatch.naming import (
+    IMPORTED_NAMES,
+    PROCESSOR_PREFIX,
+    SHARED_TASK_PREFIX,
+    TaskNameIndex,
+    sanitize
+)
+from missioncontrol.dispatch.validation import (
+    ValidationError,
+    errors,
+    validate
+)
 from missioncontrol.nodes import (
     Root,
     Serial,
@@ -47,21 +93,248 @@ from missioncontrol.nodes import (
     JobtronautTask
 )
 
+_LOG = logging.getLogger("{}.gaffer.dispatch".format(LOGGING_NAMESPACE))
+
+# The taskfile of a dispatched node, holding the Tasks of its HierarchyTasks by key
+Job = namedtuple("Job", ["label", "filepath", "keys", "structure"])
+Snapshot = namedtuple("Snapshot", ["jobs", "templates", "shared", "settings"])
+
+
+def _autopep8():
+    """ Imports autopep8 on first use, it's only needed once the taskfile gets formatted """
+    try:
+        import autopep8
+    except ImportError:
+        return None
+    return autopep8
+
+
+def _format(code):
+    code = textwrap.dedent(code)
+
+    autopep8 = _autopep8()
+    if autopep8:
+        code = autopep8.fix_code(code, options={
+            "aggressive": True,
+            "experimental": True,
+            "hang_closing": False,
+            "max_line_length": 80
+        })
+    return code
+
+
+def _write(filepath, code):
+    # rendered taskfiles are byte strings on Python 2, cached ones always unicode
+    if isinstance(code, bytes):
+        code = code.decode("utf-8")
+    with io.open(filepath, "w+", encoding="utf-8") as fp:
+        fp.write(code)
+
+
+def _write_analysis(snapshot):
+    tasks = dict(
+        (template.name, TaskInfo(template.required_tasks, template.per_element))
+        for template in snapshot.templates.values()
+    )
+    costs = load_costs(snapshot.settings["cost_estimates"])
+
+    for job in snapshot.jobs:
+        report = analyze(job.structure, tasks, costs, snapshot.settings["elements"])
+        write_report(report, sidecar_path(job.filepath, "analysis.json"))
+        _LOG.info("Analysis of {}:\n{}".format(job.label, format_report(report)))
+
+
+def write_taskfiles(snapshot, timer, progress=None, cancelled=None):
+    """ Renders, formats and writes the taskfiles of a snapshot
+
+    Doesn't touch the graph, so it can run on any thread.
+
+    Args:
+        snapshot (Snapshot): see `JobtronautDispatcher.snapshot`
+        timer (PhaseTimer): the timer of the dispatch, stopped once done
+        progress (callable): called with the number of done and total steps
+            and a label after each rendered Task and formatted taskfile
+        cancelled (threading.Event): stops the dispatch before the next Task
+            or taskfile once it is set
+
+    Raises:
+        background.Cancelled: if the dispatch got cancelled
+
+    """
+    def _check():
+        if cancelled is not None and cancelled.is_set():
+            raise background.Cancelled()
+
+    # Tasks required by several of the jobs are only rendered once, the
+    # processor definitions share their names across all jobs
+    processors = ProcessorDefinitions()
+    steps = len(snapshot.templates) + len(snapshot.jobs)
+    rendered = {}
+    constants = {}
+    bases = dict((key, base) for base, keys in snapshot.shared.items() for key in keys)
+    base_codes = {}
+    outputs = []
+    for job in snapshot.jobs:
+        tasks_code = ""
+        used = OrderedDict()
+        emitted = set()
+        for key in job.keys:
+            if key not in rendered:
+                _check()
+                with timer.phase("template rendering"):
+                    base = bases.get(key)
+                    if base is not None:
+                        base_codes[base] = _render_shared(
+                            base, snapshot.shared[base], snapshot.templates, processors, constants, rendered
+                        )
+                    else:
+                        template = snapshot.templates[key]
+                        constants[key] = [processors.intern(processor) for processor in template.argument_processors]
+                        rendered[key] = template.render(constants[key])
+                if progress:
+                    progress(len(rendered), steps, key)
+            used.update((repr(constant), None) for constant in constants[key])
+
+            base = bases.get(key)
+            if base is not None and base not in emitted:
+                emitted.add(base)
+                tasks_code += "\n\n\n{}".format(base_codes[base])
+            tasks_code += "\n\n\n{}".format(rendered[key])
+
+        code = "from jobtronaut.author import ({})".format(", ".join(IMPORTED_NAMES))
+        if used:
+            code += "\n\n{}".format(processors.definitions(used))
+        outputs.append((job.filepath, code + tasks_code))
+
+    settings = snapshot.settings
+    if settings["analysis_report"]:
+        with timer.phase("analysis"):
+            _write_analysis(snapshot)
+
+    def _formatted(index):
+        formatted.append(index)
+        if progress:
+            progress(len(snapshot.templates) + len(formatted), steps, outputs[index][0])
+
+    # taskfiles formatted before are taken from the cache, see `cache`
+    codes = [None] * len(outputs)
+    formatted = []
+    keys = []
+    cache = None
+    if settings["cache"]:
+        cache = TaskfileCache(settings["cache_directory"], settings["cache_size"] * 1024 * 1024)
+        with timer.phase("cache lookup"):
+            keys = [taskfile_key(code) for _, code in outputs]
+            for index, key in enumerate(keys):
+                codes[index] = cache.get(key)
+                if codes[index] is not None:
+                    _formatted(index)
+        if formatted:
+            _LOG.info("Reusing {} of {} formatted taskfile(s) from the cache.".format(len(formatted), len(outputs)))
+    pending = [index for index, code in enumerate(codes) if code is None]
+
+    processes = min(len(pending), settings["processes"] or multiprocessing.cpu_count())
+    if processes > 1:
+        _check()
+        with timer.phase("formatting"):
+            pool = multiprocessing.Pool(processes)
+            try:
+                for index, code in zip(pending, pool.imap(_format, [outputs[index][1] for index in pending])):
+                    codes[index] = code
+                    _formatted(index)
+            finally:
+                pool.close()
+                pool.join()
+    else:
+        for index in pending:
+            _check()
+            with timer.phase("formatting"):
+                codes[index] = _format(outputs[index][1])
+            _formatted(index)
+
+    for (output_filepath, _), code in zip(outputs, codes):
+        _check()
+        with timer.phase("file i/o"):
+            _write(output_filepath, code)
+
+    if cache is not None and pending:
+        with timer.phase("caching"):
+            for index in pending:
+                cache.put(keys[index], codes[index])
+            cache.evict()
+
+    _finish(timer, settings)
+
+
+def _finish(timer, settings):
+    timer.stop()
+    if settings["timing_report"]:
+        timer.write(settings["timings"])
+    if settings["log_timings"]:
+        timer.log(_LOG)
+
+
+def _compound_instance(node, scriptnode, compounds):
+    """ Returns what identifies a node inside of a Box or Reference across its instances, None outside of them
+
+    Args:
+        compounds (dict): fingerprints of the compounds by name, shared by all calls of a dispatch
+    """
+    compound = node.parent()
+    while compound is not None and not compound.isSame(scriptnode) and not isinstance(compound, Gaffer.SubGraph):
+        compound = compound.parent()
+    if compound is None or compound.isSame(scriptnode):
+        return None
+
+    key = compound.fullName()
+    if key not in compounds:
+        compounds[key] = compound_fingerprint(compound)
+    return compounds[key], node.relativeName(compound)
 
-class Tuple(tuple):
-    def __init__(self, iterable):
-        if len(iterable) == 1:
-            super(Tuple, self).__init__(iterable[0])
-        else:
-            super(Tuple, self).__init__(iterable)
 
+def _render_shared(base, keys, templates, processors, constants, rendered):
+    """ Renders the definition shared by the templates of several compound instances
 
-class List(list):
-    def __init__(self, iterable):
-        if len(iterable) == 1:
-            super(List, self).__init__(iterable[0])
-        else:
-            super(List, self).__init__(iterable)
+    The shared base class holds the attributes which are the same for all of
+    them, the Tasks themselves only the ones that differ, like their required
+    tasks. It doesn't derive from Task itself, so it isn't taken for a Task
+    when the taskfile gets loaded.
+    """
+    attributes = {}
+    for key in keys:
+        constants[key] = [processors.intern(processor) for processor in templates[key].argument_processors]
+        attributes[key] = templates[key].attributes(constants[key])
+
+    common = [attribute for attribute in attributes[keys[0]] if all(
+        attribute in attributes[key] for key in keys[1:]
+    )]
+    for key in keys:
+        rendered[key] = templates[key].render(constants[key], base="{}, Task".format(base), exclude=common)
+    return TaskTemplate.render_class(base, "object", common)
+
+
+def _profiled(work, capture, progress, cancelled):
+    """ Runs the work of a dispatch as part of its cProfile capture, which is written afterwards """
+    try:
+        with capture.active():
+            work(progress, cancelled)
+    finally:
+        capture.dump()
+
+
+def taskfile_path(filepath, node, scriptnode):
+    """ Returns the taskfile of one of several dispatched nodes, next to the configured taskfile """
+    base, extension = os.path.splitext(filepath)
+    return "{}_{}{}".format(base, sanitize(node.relativeName(scriptnode)), extension or ".py")
+
+
+def unique(nodes):
+    """ Returns the given nodes without repetitions, the same node may be requested more than once """
+    unique_nodes = []
+    for node in nodes:
+        if not any(node.isSame(other) for other in unique_nodes):
+            unique_nodes.append(node)
+    return unique_nodes
 
 
 class Lambda(object):
@@ -84,16 +357,45 @@ class TaskTemplate(object):
         self.per_element = False
 
     def __repr__(self):
-        code = "class {}(Task):".format(self.name)
-        code += "\n    title = '''{}'''".format(self.title)
-        code += "\n    description = '''{}'''".format(self.description) if self.description else ""
-        code += "\n    elements_id = '{}'".format(self.elements_id) if self.elements_id else ""
-        code += "\n    argument_defaults = {}".format(self.argument_defaults) if self.argument_defaults else ""
-        code += "\n    argument_processors = {}".format(self.argument_processors) if self.argument_processors else ""
-        code += "\n    flags = Task.Flags.PER_ELEMENT" if self.per_element else ""
-        code += "\n    required_tasks = {}".format(self.required_tasks)
+        return self.render()
+
+    def attributes(self, argument_processors=None):
+        """ Returns the class attributes of the Task as (name, code) pairs """
+        argument_processors = self.argument_processors if argument_processors is None else argument_processors
+
+        attributes = [("title", "'''{}'''".format(self.title))]
+        if self.description:
+            attributes.append(("description", "'''{}'''".format(self.description)))
+        if self.elements_id:
+            attributes.append(("elements_id", "'{}'".format(self.elements_id)))
+        if self.argument_defaults:
+            attributes.append(("argument_defaults", "{}".format(self.argument_defaults)))
+        if argument_processors:
+            attributes.append(("argument_processors", "{}".format(argument_processors)))
+        if self.per_element:
+            attributes.append(("flags", "Task.Flags.PER_ELEMENT"))
+        attributes.append(("required_tasks", "{}".format(self.required_tasks)))
+        return attributes
+
+    def render(self, argument_processors=None, base="Task", exclude=()):
+        """ Returns the code of the Task
+
+        Args:
+            argument_processors (list): replaces the argument processors, see `ProcessorDefinitions`
+            base (str): the classes the Task derives from
+            exclude (list): attributes the base class defines already
+
+        """
+        return TaskTemplate.render_class(self.name, base, [
+            attribute for attribute in self.attributes(argument_processors) if attribute not in exclude
+        ])
 
-        return code
+    @staticmethod
+    def render_class(name, base, attributes):
+        code = "class {}({}):".format(name, base)
+        for attribute, value in attributes:
+            code += "\n    {} = {}".format(attribute, value)
+        return code if attributes else code + "\n    pass"
 
 
 class ProcessorDefinitionTemplate(object):
@@ -112,6 +414,31 @@ class ProcessorDefinitionTemplate(object):
         return code
 
 
+class ProcessorDefinitions(object):
+    """ Interns identical processor definitions as module level constants
+
+    Processor chains are often shared by many Tasks. Every distinct definition
+    is emitted once as `_PROCESSOR_<n>` and referenced by the Tasks using it.
+    """
+    def __init__(self):
+        self._names = OrderedDict()
+
+    def intern(self, processor):
+        """ Returns the constant the Tasks reference the given processor definition by """
+        code = "{}".format(processor)
+        if code not in self._names:
+            # like lambdas, the reference is emitted as it is
+            self._names[code] = Lambda("{}{}".format(PROCESSOR_PREFIX, len(self._names)))
+        return self._names[code]
+
+    def definitions(self, names=None):
+        """ Returns the code defining the given constants, or all of them """
+        return "\n".join(
+            "{!r} = {}".format(name, code) for code, name in self._names.items()
+            if names is None or repr(name) in names
+        )
+
+
 class JobtronautDispatcher(GafferDispatch.Dispatcher):
     """ Helper class to work around the limitation that we can't instantiate
     Gaffer.GafferDispatch.Dispatcher._TaskBatch directly. We have to utilize
@@ -138,6 +465,92 @@ class JobtronautDispatcher(GafferDispatch.Dispatcher):
         Gaffer.Metadata.registerPlugValue(taskfile_location_plug, "path:leaf", False)
         self.addChild(taskfile_location_plug)
 
+        validate_plug = Gaffer.BoolPlug("validate", Gaffer.Plug.Direction.In, defaultValue=True)
+        Gaffer.Metadata.registerPlugValue(validate_plug, "nodule:type", "")
+        Gaffer.Metadata.registerPlugValue(
+            validate_plug, "description", "Validates the graph before dispatching and aborts on errors."
+        )
+        self.addChild(validate_plug)
+
+        # Instrumentation of the dispatch phases, see `dispatch`
+        for name, description in (
+            ("timing_report", "Writes the time spent per dispatch phase to a JSON file next to the taskfile."),
+            ("log_timings", "Logs the time spent per dispatch phase."),
+            ("cprofile", "Writes a cProfile capture of the dispatch next to the taskfile."),
+        ):
+            plug = Gaffer.BoolPlug(name, Gaffer.Plug.Direction.In, defaultValue=False)
+            Gaffer.Metadata.registerPlugValue(plug, "nodule:type", "")
+            Gaffer.Metadata.registerPlugValue(plug, "description", description)
+            Gaffer.Metadata.registerPlugValue(plug, "layout:section", "Profiling")
+            self.addChild(plug)
+
+        # Critical path and parallelism analysis, see `_write_analysis`
+        analysis_plug = Gaffer.BoolPlug("analysis_report", Gaffer.Plug.Direction.In, defaultValue=False)
+        Gaffer.Metadata.registerPlugValue(
+            analysis_plug, "description",
+            "Writes the critical path and parallelism analysis of the job to a JSON file next to the taskfile."
+        )
+        cost_estimates_plug = Gaffer.StringPlug("cost_estimates", Gaffer.Plug.Direction.In)
+        Gaffer.Metadata.registerPlugValue(cost_estimates_plug, "plugValueWidget:type", "GafferUI.FileSystemPathPlugValueWidget")
+        Gaffer.Metadata.registerPlugValue(
+            cost_estimates_plug, "description",
+            "A JSON file mapping task names to estimated costs, e.g. seconds, used to weight the analysis. "
+            "Tasks without an estimate cost 1."
+        )
+        elements_plug = Gaffer.IntPlug("elements", Gaffer.Plug.Direction.In, defaultValue=1, minValue=1)
+        Gaffer.Metadata.registerPlugValue(
+            elements_plug, "description",
+            "The number of elements the analysis and local execution assume for per element tasks."
+        )
+        for plug in (analysis_plug, cost_estimates_plug, elements_plug):
+            Gaffer.Metadata.registerPlugValue(plug, "nodule:type", "")
+            Gaffer.Metadata.registerPlugValue(plug, "layout:section", "Analysis")
+            self.addChild(plug)
+
+        processes_plug = Gaffer.IntPlug("processes", Gaffer.Plug.Direction.In, defaultValue=0, minValue=0)
+        Gaffer.Metadata.registerPlugValue(processes_plug, "nodule:type", "")
+        Gaffer.Metadata.registerPlugValue(
+            processes_plug, "description",
+            "The number of worker processes formatting and writing the taskfiles if several nodes are "
+            "dispatched at once, each of them gets its own taskfile. 0 uses one process per CPU. "
+            "Dispatches from the UI always format the taskfiles in the UI process itself."
+        )
+        self.addChild(processes_plug)
+
+        background_plug = Gaffer.BoolPlug("background", Gaffer.Plug.Direction.In, defaultValue=True)
+        Gaffer.Metadata.registerPlugValue(background_plug, "nodule:type", "")
+        Gaffer.Metadata.registerPlugValue(
+            background_plug, "description",
+            "Renders and writes the taskfiles in the background when dispatching from the UI, "
+            "so it stays responsive. Batch dispatches always run in the foreground."
+        )
+        self.addChild(background_plug)
+
+        # Reuse of the formatted taskfiles of unchanged graphs, see `cache`
+        cache_plug = Gaffer.BoolPlug("cache", Gaffer.Plug.Direction.In, defaultValue=False)
+        Gaffer.Metadata.registerPlugValue(
+            cache_plug, "description",
+            "Reuses the formatted taskfiles of earlier dispatches if the rendered taskfile didn't change. "
+            "The cache belongs to the current user."
+        )
+        cache_directory_plug = Gaffer.StringPlug(
+            "cache_directory", Gaffer.Plug.Direction.In, defaultValue=default_directory()
+        )
+        Gaffer.Metadata.registerPlugValue(
+            cache_directory_plug, "plugValueWidget:type", "GafferUI.FileSystemPathPlugValueWidget"
+        )
+        Gaffer.Metadata.registerPlugValue(cache_directory_plug, "path:leaf", False)
+        Gaffer.Metadata.registerPlugValue(cache_directory_plug, "description", "Where the taskfiles are cached.")
+        cache_size_plug = Gaffer.IntPlug("cache_size", Gaffer.Plug.Direction.In, defaultValue=512, minValue=1)
+        Gaffer.Metadata.registerPlugValue(
+            cache_size_plug, "description",
+            "The size of the cache in MB, the least recently used taskfiles are removed beyond it."
+        )
+        for plug in (cache_plug, cache_directory_plug, cache_size_plug):
+            Gaffer.Metadata.registerPlugValue(plug, "nodule:type", "")
+            Gaffer.Metadata.registerPlugValue(plug, "layout:section", "Cache")
+            self.addChild(plug)
+
     @staticmethod
     def _get_named_values(parent, plug_name, ignore_if_default=False):
         mapped = {}
@@ -165,63 +578,178 @@ class JobtronautDispatcher(GafferDispatch.Dispatcher):
         return mapped
 
     def dispatch(self, nodes):
-        submitting_node = nodes[0]
-        scriptnode = submitting_node.scriptNode()
+        filepath = self.getChild("taskfile").getValue()
+        timer = PhaseTimer("dispatch")
+
+        unique_nodes = unique(nodes)
+
+        if self.getChild("validate").getValue():
+            issues = []
+            with timer.phase("validation"):
+                for node in unique_nodes:
+                    issues.extend(issue for issue in validate(node) if issue not in issues)
+            for issue in issues:
+                _LOG.warning("{}: {}".format(issue.path, issue.message))
+            if errors(issues):
+                raise ValidationError(issues)
+
+        # the capture is continued on the worker thread for background dispatches, see `_profiled`
+        capture = ProfileCapture(sidecar_path(filepath, "prof"), enabled=self.getChild("cprofile").getValue())
+        in_background = self.runs_in_background()
+
+        with capture.active():
+            scriptnode = unique_nodes[0].scriptNode()
+            settings = self._settings(filepath)
+            if background.ui_session():
+                # forking the multithreaded UI process isn't safe, the taskfiles are formatted in this process
+                settings["processes"] = 1
+
+            snapshot = self.snapshot(unique_nodes, filepath, timer, settings)
+            write = lambda progress, cancelled: write_taskfiles(snapshot, timer, progress, cancelled)
+
+            work = functools.partial(_profiled, self._work(unique_nodes, write), capture)
+
+        if in_background:
+            dispatch = background.BackgroundDispatch(
+                ", ".join(node.relativeName(scriptnode) for node in unique_nodes), work
+            )
+            dispatch.start()
+            return dispatch
+
+        work(None, None)
+
+    def runs_in_background(self):
+        """ Whether dispatches write their taskfiles on a worker thread, see `background` """
+        return self.getChild("background").getValue() and background.observed()
+
+    def _work(self, nodes, write):
+        """ Returns the part of the dispatch which doesn't read the graph
+
+        The returned callable gets a progress callable and the cancellation
+        event, see `write_taskfiles`, and may run on a worker thread.
+        """
+        return write
+
+    def _settings(self, filepath):
+        settings = dict(
+            (name, self.getChild(name).getValue()) for name in (
+                "analysis_report", "cost_estimates", "elements", "processes", "timing_report", "log_timings",
+                "cache", "cache_directory", "cache_size"
+            )
+        )
+        settings["timings"] = sidecar_path(filepath, "timings.json")
+        return settings
+
+    def snapshot(self, nodes, filepath, timer, settings=None):
+        """ Collects everything needed to write the taskfiles of the given nodes
+
+        This is the only part of a dispatch that reads the graph, so it has to
+        run on the UI thread, see `write_taskfiles` for the rest.
+
+        Returns:
+            Snapshot: the jobs, the templates of their Tasks, the keys of
+                the templates sharing a definition and the settings
+        """
+        scriptnode = nodes[0].scriptNode()
+        settings = settings or self._settings(filepath)
 
         # todo: figure out how to get the filename/scriptnode in the __init__ call
         # filename = os.path.splitext(os.path.basename(scriptnode.getChild("fileName").getValue()))[0]
         # self.getChild("taskfile").setValue("/tmp/jobtronaut_plugins/{}.py".format(filename))
 
-        all_hierarchy_nodes = JobtronautDispatcher.get_hierarchy_nodes(submitting_node, scriptnode)
-
-        code = "from jobtronaut.author import (Task, ProcessorDefinition)"
-
-        for hierarchy_node in all_hierarchy_nodes:
-            template = TaskTemplate(hierarchy_node.getName())
-            template.required_tasks = JobtronautDispatcher.get_required_tasks(hierarchy_node, scriptnode)
-
-            for processor_node in JobtronautDispatcher.get_processors(hierarchy_node):
-                processor = ProcessorDefinitionTemplate(processor_node.getChild("type").getValue())
-                processor.scope = list(processor_node.getChild("scope").getValue())
-
+        # all traversals share the connections they looked at already
+        downstream = cached_downstream_nodes()
+
+        with timer.phase("hierarchy discovery"):
+            task_nodes = [
+                JobtronautDispatcher.get_hierarchy_nodes(
+                    node, scriptnode, type_filter=(HierarchyTask, JobtronautTask), downstream=downstream
+                ) for node in nodes
+            ]
+
+        with timer.phase("name indexing"):
+            # one index for all taskfiles, so a Task has the same name in all of them
+            names = TaskNameIndex([node for connected in task_nodes for node in connected])
+            for node, name in names.renamed:
+                _LOG.info("{} is emitted as Task \"{}\".".format(node.relativeName(scriptnode), name))
+
+        # Tasks reachable from several of the nodes are only collected once
+        templates = OrderedDict()
+        instances = OrderedDict()
+        compounds = {}
+        jobs = []
+        for node, connected in zip(nodes, task_nodes):
+            keys = []
+            for hierarchy_node in connected:
+                if not isinstance(hierarchy_node, HierarchyTask):
+                    continue
+                key = hierarchy_node.relativeName(scriptnode)
+                if key not in templates:
+                    templates[key] = self._task_template(hierarchy_node, scriptnode, names, downstream, timer)
+                    with timer.phase("compound detection"):
+                        instance = _compound_instance(hierarchy_node, scriptnode, compounds)
+                    if instance is not None:
+                        instances.setdefault(instance, []).append(key)
+                keys.append(key)
+
+            structure = None
+            if settings["analysis_report"]:
+                with timer.phase("analysis"):
+                    if isinstance(node, HierarchyTask):
+                        structure = List([names.name(node)])
+                    else:
+                        structure = JobtronautDispatcher.get_required_tasks(
+                            node, scriptnode, names, downstream=downstream
+                        )
+
+            jobs.append(Job(
+                node.relativeName(scriptnode),
+                taskfile_path(filepath, node, scriptnode) if len(nodes) > 1 else filepath,
+                keys,
+                structure
+            ))
+
+        # HierarchyTasks at the same place in identical compounds share their definition
+        shared = OrderedDict(
+            ("{}{}".format(SHARED_TASK_PREFIX, index), keys)
+            for index, keys in enumerate(keys for keys in instances.values() if len(keys) > 1)
+        )
+        return Snapshot(jobs, templates, shared, settings)
+
+    def _task_template(self, hierarchy_node, scriptnode, names, downstream, timer):
+        template = TaskTemplate(names.name(hierarchy_node))
+        with timer.phase("required task resolution"):
+            template.required_tasks = JobtronautDispatcher.get_required_tasks(
+                hierarchy_node, scriptnode, names, downstream=downstream
+            )
+
+        with timer.phase("processor chain walking"):
+            processor_nodes = JobtronautDispatcher.get_processors(hierarchy_node)
+
+        for processor_node in processor_nodes:
+            processor = ProcessorDefinitionTemplate(processor_node.getChild("type").getValue())
+            processor.scope = list(processor_node.getChild("scope").getValue())
+
+            with timer.phase("_get_named_values"):
                 processor.parameters = self._get_named_values(processor_node, "parameters", ignore_if_default=True)
 
-                template.argument_processors.append(processor)
+            template.argument_processors.append(processor)
 
+        with timer.phase("_get_named_values"):
             argument_defaults = self._get_named_values(hierarchy_node, "argument_defaults")
 
-            template.argument_defaults = argument_defaults
-            template.title = hierarchy_node.getChild("title").getValue()
-            template.description = hierarchy_node.getChild("description").getValue()
-            template.elements_id = hierarchy_node.getChild("elements_id").getValue()
-            template.per_element = hierarchy_node.getChild("per_element").getValue()
+        template.argument_defaults = argument_defaults
+        template.title = hierarchy_node.getChild("title").getValue()
+        template.description = hierarchy_node.getChild("description").getValue()
+        template.elements_id = hierarchy_node.getChild("elements_id").getValue()
+        template.per_element = hierarchy_node.getChild("per_element").getValue()
 
-            code += "\n\n\n{}".format(template)
-
-        code = textwrap.dedent(code)
-
-        if autopep8:
-            code = autopep8.fix_code(code, options={
-                "aggressive": True,
-                "experimental": True,
-                "hang_closing": False,
-                "max_line_length": 80
-            })
-
-        filepath = self.getChild("taskfile").getValue()
-        with open(filepath, "w+") as fp:
-            fp.write(code)
+        return template
 
     @staticmethod
-    def get_hierarchy_nodes(startnode, scriptnode, type_filter=HierarchyTask):
+    def get_hierarchy_nodes(startnode, scriptnode, type_filter=HierarchyTask, downstream=downstream_nodes):
         connected = Gaffer.StandardSet()
-        graphgadget = GafferUI.GraphGadget(scriptnode)
-        if graphgadget is not None:
-            connected.add([g.node() for g in graphgadget.connectedNodeGadgets(
-                startnode,
-                Gaffer.Plug.Direction.Out,
-                sys.maxint
-            ) if isinstance(g.node(), type_filter)])
+        connected.add([node for node in connected_nodes(startnode, downstream) if isinstance(node, type_filter)])
 
         if isinstance(startnode, type_filter):
             connected.add(startnode)
@@ -243,58 +771,32 @@ class JobtronautDispatcher(GafferDispatch.Dispatcher):
 
 
     @staticmethod
-    def get_required_tasks(startnode, scriptnode):
-        graphgadget = GafferUI.GraphGadget(scriptnode)
-        assert graphgadget, "We need a proper graphgadget."
-
-        def _reduce_hierarchy_levels(nodes):
-            """ Reduces unnecessary hierarchy levels for those cases that there's
-            only a single entry in a Tuple or List. In these cases the nesting
-            does not add any useful information and can be ignored.
-            """
-            if isinstance(nodes, List):
-                while len(nodes) == 1:
-                    nodes = nodes[0]
-
-            elif isinstance(nodes, Tuple):
-                while (len(nodes)) == 1:
-                    nodes = nodes[0]
-                if not isinstance(nodes, Tuple):
-                    nodes = Tuple(nodes)
-
-            return nodes
+    def get_required_tasks(startnode, scriptnode, names=None, downstream=downstream_nodes):
+        if names is None:
+            names = TaskNameIndex([])
 
         def _get_nodes(current):
-            required_tasks = List([])
-            downstream_nodes = tuple([g.node() for g in graphgadget.connectedNodeGadgets(
-                current,
-                Gaffer.Plug.Direction.Out,
-                1
-            )])
+            required_tasks = List()
 
             # Sorting by the x position is the expected behaviour for serial execution.
             # We assume that the x ordering of downstream nodes is the determining
             # factor for execution order.
-            downstream_nodes = sorted(downstream_nodes, key=lambda node: graphgadget.getNodePosition(node).x)
-
-            for node in downstream_nodes:
+            for node in sorted(downstream(current), key=lambda node: node_position(node).x):
                 if isinstance(node, Gaffer.Dot):
-                    required_tasks.append(_reduce_hierarchy_levels(_get_nodes(node)))
+                    required_tasks.append(_get_nodes(node))
                 elif isinstance(node, Serial):
-                    required_tasks.append(_reduce_hierarchy_levels(Tuple(_get_nodes(node))))
+                    required_tasks.append(Tuple(_get_nodes(node)))
                 elif isinstance(node, Parallel):
-                    required_tasks.append(_reduce_hierarchy_levels(List(_get_nodes(node))))
+                    required_tasks.append(_get_nodes(node))
                 elif isinstance(node, (HierarchyTask, JobtronautTask)):
-                    required_tasks.append(node.getName())
+                    required_tasks.append(names.name(node))
 
-            return _reduce_hierarchy_levels(required_tasks)
+            return required_tasks
 
-        required_tasks = _get_nodes(startnode)
+        required_tasks = normalize(_get_nodes(startnode))
 
         # Make sure that we don't end up with a single required task without any wrapping List or Tuple
-        return required_tasks if isinstance(required_tasks, (List, Tuple)) else [required_tasks]
-
-
+        return required_tasks if isinstance(required_tasks, (List, Tuple)) else List([required_tasks])
 
     @staticmethod
     def initialize(parent_plug):
@@ -0,0 +1,184 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Pre-dispatch validation of task graphs.
+
+All checks are done within a single depth first traversal starting from the
+node to dispatch, so every node and connection is only visited once. Instead
+of failing on the first problem, all found issues are collected and returned
+together.
+"""
+
+from collections import namedtuple
+
+import Gaffer
+
+from missioncontrol.nodes import (
+    HierarchyTask,
+    JobtronautProcessor,
+    JobtronautTask
+)
+
+from missioncontrol.dispatch.graph import downstream_nodes
+
+ERROR = "error"
+WARNING = "warning"
+
+Issue = namedtuple("Issue", ["severity", "path", "message"])
+
+# DFS colouring
+_WHITE, _GREY, _BLACK = range(3)
+
+
+class ValidationError(Exception):
+    def __init__(self, issues):
+        self.issues = issues
+        super(ValidationError, self).__init__(
+            "Validation failed:\n{}".format(format_issues(issues))
+        )
+
+
+def format_issues(issues):
+    return "\n".join("{}: {}: {}".format(issue.severity, issue.path, issue.message) for issue in issues)
+
+
+def errors(issues):
+    return [issue for issue in issues if issue.severity == ERROR]
+
+
+def _path(node):
+    scriptnode = node.scriptNode()
+    return node.relativeName(scriptnode) if scriptnode else node.fullName()
+
+
+def _check_type(node, issues):
+    type_plug = node.getChild("type")
+    if type_plug is not None and not type_plug.getValue():
+        issues.append(Issue(ERROR, _path(node), "The \"type\" plug is empty."))
+
+
+def _check_processors(hierarchy_node, issues, validated):
+    """ Walks the processor chain upstream of a HierarchyTask
+
+    Chains shared by multiple HierarchyTasks are only walked until the first
+    node that was validated before.
+    """
+    current_plug = hierarchy_node.getChild("processor").getInput()
+    chain = set()
+
+    while current_plug:
+        node = current_plug.node()
+        key = node.fullName()
+        if key in chain:
+            issues.append(Issue(ERROR, _path(node), "The processor chain contains a cycle."))
+            return
+        if key in validated:
+            return
+        chain.add(key)
+        validated.add(key)
+
+        if isinstance(node, Gaffer.Dot):
+            current_plug = node.getChild("in").getInput()
+            if current_plug is None:
+                issues.append(Issue(
+                    ERROR, _path(node), "Dot in the processor chain of {} has no input.".format(
+                        _path(hierarchy_node)
+                    )
+                ))
+        elif isinstance(node, JobtronautProcessor):
+            _check_type(node, issues)
+            current_plug = node.getChild("in").getInput()
+        else:
+            issues.append(Issue(
+                ERROR, _path(node), "{} is not a valid input for the processor chain of {}.".format(
+                    node.typeName(), _path(hierarchy_node)
+                )
+            ))
+            return
+
+
+def validate(startnode):
+    """ Validates the graph downstream of the given node
+
+    Args:
+        startnode (Gaffer.Node): usually the Root node to dispatch
+
+    Returns:
+        list: the found `Issue` instances
+
+    """
+    issues = []
+    names = {}
+    plugin_names = set()
+    validated_processors = set()
+    colours = {startnode.fullName(): _GREY}
+
+    # iterative DFS, every stack entry holds a node and an iterator over its downstream nodes
+    stack = [(startnode, iter(downstream_nodes(startnode)))]
+
+    def _visit(node):
+        if isinstance(node, HierarchyTask):
+            names.setdefault(node.getName(), []).append(node)
+            _check_processors(node, issues, validated_processors)
+        elif isinstance(node, JobtronautTask):
+            _check_type(node, issues)
+            plugin_names.add(node.getChild("type").getValue())
+
+    _visit(startnode)
+
+    while stack:
+        node, children = stack[-1]
+        child = next(children, None)
+
+        if child is None:
+            colours[node.fullName()] = _BLACK
+            stack.pop()
+            continue
+
+        colour = colours.get(child.fullName(), _WHITE)
+        if colour == _GREY:
+            trail = [entry[0] for entry in stack]
+            cycle = trail[[n.fullName() for n in trail].index(child.fullName()):] + [child]
+            issues.append(Issue(
+                ERROR, _path(child), "Cycle detected: {}".format(" -> ".join(_path(n) for n in cycle))
+            ))
+        elif colour == _WHITE:
+            colours[child.fullName()] = _GREY
+            _visit(child)
+            stack.append((child, iter(downstream_nodes(child))))
+
+    # the dispatcher disambiguates these names, but the emitted Task names will differ from the node names
+    for name, nodes in names.items():
+        if len(nodes) > 1:
+            issues.append(Issue(
+                WARNING, ", ".join(_path(node) for node in nodes),
+                "HierarchyTasks named \"{}\" will be emitted with disambiguated Task names.".format(name)
+            ))
+        if name in plugin_names:
+            issues.append(Issue(
+                WARNING, ", ".join(_path(node) for node in nodes),
+                "HierarchyTask name \"{}\" clashes with a jobtronaut task and will be renamed.".format(name)
+            ))
+
+    return issues
@@ -0,0 +1,215 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Re-dispatching of scripts whenever they are saved.
+
+The scripts are polled for changes. Once a script stopped changing for the
+debounce time it gets reloaded into the same process, so the jobtronaut
+plugins stay loaded, and only the Roots whose graphs changed are dispatched
+again, each to its own taskfile.
+
+Every update still loads the whole script and fingerprints every node
+reachable from the Roots, Gaffer doesn't tell which parts of a file changed.
+The time of an update grows with the size of the script, only the
+dispatches of unchanged Roots are saved. The diff of the node fingerprints
+is logged for information.
+"""
+
+import logging
+import os
+import time
+import traceback
+
+from timeit import default_timer
+
+import Gaffer
+
+from jobtronaut.constants import LOGGING_NAMESPACE
+
+from missioncontrol.dispatch.fingerprint import (
+    Fingerprints,
+    diff
+)
+from missioncontrol.dispatch.graph import cached_downstream_nodes
+from missioncontrol.dispatch.naming import sanitize
+from missioncontrol.nodes import Root
+
+_LOG = logging.getLogger("{}.gaffer.dispatch".format(LOGGING_NAMESPACE))
+
+
+def _stat(filepath):
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return stat.st_mtime, stat.st_size
+
+
+class WatchedScript(object):
+    def __init__(self, filepath):
+        self.filepath = os.path.abspath(filepath)
+        self.scriptnode = None
+        self.stat = None
+        self.changed_at = None
+        self.node_fingerprints = {}
+        self.graph_fingerprints = {}
+
+    @property
+    def name(self):
+        return os.path.splitext(os.path.basename(self.filepath))[0]
+
+
+class ScriptWatcher(object):
+    """ Watches scripts and dispatches their Roots on changes
+
+    Args:
+        application_root (Gaffer.ApplicationRoot): the loaded scripts are
+            added to its "scripts"
+        dispatcher (JobtronautDispatcher): the dispatcher, its taskfile plug
+            is the base for the taskfiles of the Roots
+        filepaths (list): the scripts to watch
+        nodes (list): the names of the nodes to dispatch, all Roots if empty
+        prepare (callable): called with every reloaded ScriptNode before
+            dispatching, e.g. to apply settings; returning True skips the
+            dispatch
+        interval (float): seconds between polls
+        debounce (float): seconds a script must not change before it is
+            reloaded
+
+    """
+    def __init__(self, application_root, dispatcher, filepaths, nodes=(), prepare=None, interval=0.25,
+                 debounce=1.0):
+        self.application_root = application_root
+        self.dispatcher = dispatcher
+        self.scripts = [WatchedScript(filepath) for filepath in filepaths]
+        self.nodes = list(nodes)
+        self.interval = interval
+        self.debounce = debounce
+        self._prepare = prepare
+
+    def run(self):
+        """ Dispatches all scripts once and then whenever they change, until interrupted """
+        for script in self.scripts:
+            script.stat = _stat(script.filepath)
+            self.update(script)
+
+        _LOG.info("Watching {} script(s) for changes.".format(len(self.scripts)))
+        try:
+            while True:
+                self.poll()
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
+
+    def poll(self):
+        now = default_timer()
+        for script in self.scripts:
+            stat = _stat(script.filepath)
+            if stat != script.stat:
+                # every further change restarts the debounce time
+                script.stat = stat
+                script.changed_at = now
+            elif script.changed_at is not None and now - script.changed_at >= self.debounce:
+                script.changed_at = None
+                if stat is not None:
+                    self.update(script)
+
+    def taskfile(self, script, node, filepath):
+        """ Returns the taskfile of a Root, next to the given taskfile of the dispatcher """
+        base, extension = os.path.splitext(filepath)
+        if len(self.scripts) > 1:
+            base = "{}_{}".format(base, sanitize(script.name))
+        return "{}_{}{}".format(base, sanitize(node.relativeName(script.scriptnode)), extension or ".py")
+
+    def _roots(self, scriptnode):
+        if self.nodes:
+            return [node for node in (scriptnode.descendant(name) for name in self.nodes) if node is not None]
+        return [node for node in scriptnode.children(Gaffer.Node) if isinstance(node, Root)]
+
+    def update(self, script):
+        """ Reloads the script and dispatches the Roots that changed since the last update """
+        start = default_timer()
+        try:
+            self._load(script)
+            if self._prepare and self._prepare(script.scriptnode):
+                return
+        except Exception:
+            _LOG.error("Loading {} failed.\n{}".format(script.filepath, traceback.format_exc()))
+            return
+
+        fingerprints = Fingerprints(script.scriptnode, cached_downstream_nodes())
+        roots = self._roots(script.scriptnode)
+        graphs = dict((root.relativeName(script.scriptnode), fingerprints.graph(root)) for root in roots)
+
+        changes = diff(script.node_fingerprints, fingerprints.nodes)
+        for label, names in zip(("Added", "Removed", "Changed"), changes):
+            if names:
+                _LOG.info("{} in {}: {}".format(label, script.name, ", ".join(names)))
+
+        dispatched = 0
+        for root in roots:
+            key = root.relativeName(script.scriptnode)
+            if script.graph_fingerprints.get(key) == graphs[key]:
+                continue
+            if self._dispatch(script, root):
+                script.graph_fingerprints[key] = graphs[key]
+                dispatched += 1
+            else:
+                # try again with the next change
+                script.graph_fingerprints.pop(key, None)
+
+        for key in set(script.graph_fingerprints) - set(graphs):
+            del script.graph_fingerprints[key]
+        script.node_fingerprints = fingerprints.nodes
+
+        _LOG.info("Updated {} in {:.3f}s, dispatched {} of {} Root(s).".format(
+            script.name, default_timer() - start, dispatched, len(roots)
+        ))
+
+    def _load(self, script):
+        if script.scriptnode is None:
+            script.scriptnode = Gaffer.ScriptNode()
+            Gaffer.NodeAlgo.applyUserDefaults(script.scriptnode)
+            self.application_root["scripts"].addChild(script.scriptnode)
+            script.scriptnode["fileName"].setValue(script.filepath)
+
+        # loading replaces the contents of the script
+        script.scriptnode.load()
+
+    def _dispatch(self, script, root):
+        taskfile_plug = self.dispatcher.getChild("taskfile")
+        base_taskfile = taskfile_plug.getValue()
+        taskfile = self.taskfile(script, root, base_taskfile)
+        taskfile_plug.setValue(taskfile)
+        try:
+            with script.scriptnode.context():
+                self.dispatcher.dispatch([root])
+        except Exception:
+            _LOG.error("Dispatching {} failed.\n{}".format(root.relativeName(script.scriptnode), traceback.format_exc()))
+            return False
+        finally:
+            taskfile_plug.setValue(base_taskfile)
+
+        _LOG.info("Dispatched {} to {}.".format(root.relativeName(script.scriptnode), taskfile))
+        return True
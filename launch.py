@@ -0,0 +1,64 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Execution of the application startup files.
+
+This follows what `IECore.loadConfig` does for `GAFFER_STARTUP_PATHS`, but
+executes the files one by one, so they can be timed and filtered.
+"""
+
+import os
+import re
+import traceback
+
+import IECore
+
+_STARTUP_FILE = re.compile(r"^[^~].*\.py$")
+
+
+def startup_files(subdirectory, env_var="GAFFER_STARTUP_PATHS"):
+    """ Returns the startup files in the order `IECore.loadConfig` executes them """
+    filepaths = []
+    for path in reversed([path for path in os.environ.get(env_var, "").split(os.pathsep) if path]):
+        for directory, _, filenames in os.walk(os.path.join(path, subdirectory)):
+            for filename in sorted(filenames):
+                if _STARTUP_FILE.search(filename):
+                    filepaths.append(os.path.abspath(os.path.join(directory, filename)))
+    return filepaths
+
+
+def execute_startup_file(filepath, context):
+    """ Executes a single startup file, errors are reported but don't stop the application """
+    file_context = dict(context)
+    file_context["__file__"] = filepath
+    try:
+        with open(filepath) as fp:
+            code = compile(fp.read(), filepath, "exec")
+        exec(code, file_context, file_context)
+    except Exception:
+        IECore.msg(
+            IECore.Msg.Level.Error,
+            "missioncontrol startup",
+            "Error executing file \"{}\".\n{}".format(filepath, traceback.format_exc())
+        )
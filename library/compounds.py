@@ -0,0 +1,135 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Live tracking of the compounds available in `GAFFER_COMPOUNDS_PATH`. """
+
+import logging
+import os
+import threading
+
+from collections import namedtuple
+
+from jobtronaut.constants import LOGGING_NAMESPACE
+
+_LOG = logging.getLogger("{}.gaffer.library".format(LOGGING_NAMESPACE))
+
+Changes = namedtuple("Changes", ["added", "removed", "updated"])
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def compound_name(filepath):
+    return os.path.splitext(os.path.basename(filepath))[0]
+
+
+class CompoundWatcher(object):
+    """ Polls a compounds directory in a daemon thread
+
+    Each poll stats the directory and the known compound files only. The
+    directory is only listed again if its mtime changed, which is the case
+    when files were added, removed or renamed. The callback gets a `Changes`
+    instance holding (name, filepath) tuples and is called from the worker
+    thread.
+    """
+    def __init__(self, directory, callback, interval=10.0, extension=".grf"):
+        self.directory = directory
+        self.interval = interval
+        self._callback = callback
+        self._extension = extension
+        self._directory_mtime = None
+        self._files = {}
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self, known=()):
+        """ Starts polling
+
+        Args:
+            known (list): paths of the compounds that are known already,
+                they are only reported if they change afterwards
+
+        """
+        for filepath in known:
+            self._files.setdefault(filepath, None)
+
+        self._thread = threading.Thread(target=self._run, name="missioncontrol-compounds")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def poll(self):
+        """ Checks the directory for changes since the last poll
+
+        Returns:
+            Changes: the added, removed and updated compounds
+
+        """
+        added, removed, updated = [], [], []
+
+        directory_mtime = _mtime(self.directory)
+        if directory_mtime != self._directory_mtime:
+            self._directory_mtime = directory_mtime
+            try:
+                current = set(
+                    os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                    if name.endswith(self._extension)
+                )
+            except OSError:
+                current = set()
+
+            for filepath in set(self._files) - current:
+                del self._files[filepath]
+                removed.append((compound_name(filepath), filepath))
+
+            for filepath in current - set(self._files):
+                self._files[filepath] = _mtime(filepath)
+                added.append((compound_name(filepath), filepath))
+
+        for filepath, previous in list(self._files.items()):
+            mtime = _mtime(filepath)
+            if mtime is None:
+                # removed in between listing and stating, the next directory check reports it
+                continue
+            if previous is not None and mtime != previous:
+                updated.append((compound_name(filepath), filepath))
+            self._files[filepath] = mtime
+
+        return Changes(sorted(added), sorted(removed), sorted(updated))
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                changes = self.poll()
+                if any(changes):
+                    self._callback(changes)
+            except Exception:
+                _LOG.exception("Polling the compounds in {} failed.".format(self.directory))
+            self._stopped.wait(self.interval)
@@ -0,0 +1,259 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Persistent index of the plugins and compounds offered in the node menu.
+
+Plugin and compound directories usually live on network storage, so scanning
+them on every launch is slow. The index remembers the modification times of
+all scanned directories and files. A refresh only stats them and rescans the
+files and directories that changed since the last launch, loading the index
+itself is a single read.
+"""
+
+import json
+import logging
+import os
+import sys
+
+from jobtronaut.constants import LOGGING_NAMESPACE
+
+try:
+    from importlib.machinery import SourceFileLoader
+
+    def _load_source(name, filepath):
+        return SourceFileLoader(name, filepath).load_module()
+except ImportError:
+    from imp import load_source as _load_source
+
+_LOG = logging.getLogger("{}.gaffer.library".format(LOGGING_NAMESPACE))
+
+_VERSION = 1
+
+
+def default_index_path():
+    """ Returns the location of the index, which can be set by `MISSIONCONTROL_MENU_INDEX` """
+    return os.getenv("MISSIONCONTROL_MENU_INDEX") or os.path.expanduser("~/.missioncontrol/menuindex.json")
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _describe(plugin):
+    return {"name": plugin.__name__, "description": getattr(plugin, "description", "") or ""}
+
+
+def _scan_file(filepath):
+    """ Collects all tasks and processors defined in the given plugin file """
+    from jobtronaut.author import (
+        Processor,
+        Task
+    )
+
+    record = {"mtime": _mtime(filepath), "tasks": [], "processors": []}
+    module_name = "missioncontrol_menuindex_{}".format(abs(hash(filepath)))
+    try:
+        module = _load_source(module_name, filepath)
+    except Exception:
+        _LOG.exception("Failed to load plugin file {}.".format(filepath))
+        return record
+    finally:
+        # the module is only read here, jobtronaut loads the plugins it uses itself
+        sys.modules.pop(module_name, None)
+
+    for value in vars(module).values():
+        if not isinstance(value, type) or value.__module__ != module.__name__:
+            continue
+        if issubclass(value, Task):
+            record["tasks"].append(_describe(value))
+        elif issubclass(value, Processor):
+            record["processors"].append(_describe(value))
+
+    return record
+
+
+class MenuIndex(object):
+    def __init__(self, filepath=None, plugin_paths=None, compounds_path=None):
+        if plugin_paths is None:
+            from jobtronaut.constants import PLUGIN_PATH
+            plugin_paths = PLUGIN_PATH
+
+        self.filepath = filepath or default_index_path()
+        self.plugin_paths = list(plugin_paths)
+        self.compounds_path = compounds_path if compounds_path is not None else os.getenv("GAFFER_COMPOUNDS_PATH")
+        self._plugins = {}
+        self._compounds = {}
+
+    def load(self):
+        """ Reads the index from disk
+
+        Returns:
+            bool: False if there was no usable index
+
+        """
+        try:
+            with open(self.filepath) as fp:
+                data = json.load(fp)
+        except (IOError, OSError, ValueError):
+            return False
+
+        if data.get("version") != _VERSION:
+            return False
+
+        self._plugins = data["plugins"]
+        self._compounds = data["compounds"]
+        return True
+
+    def save(self):
+        directory = os.path.dirname(self.filepath)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        # write to a temporary file first, so concurrent sessions never read a partial index
+        temporary = "{}.{}".format(self.filepath, os.getpid())
+        with open(temporary, "w") as fp:
+            json.dump({"version": _VERSION, "plugins": self._plugins, "compounds": self._compounds}, fp)
+        os.rename(temporary, self.filepath)
+
+    def refresh(self):
+        """ Rescans everything that changed on disk and saves the index if necessary
+
+        Returns:
+            tuple: the names of all tasks and all processors
+
+        """
+        # compounds first, so they stay up to date even if importing a plugin fails
+        changed = self._refresh_compounds()
+        changed = self._refresh_plugins() or changed
+        if changed:
+            try:
+                self.save()
+            except (IOError, OSError):
+                _LOG.exception("Failed to save the menu index to {}.".format(self.filepath))
+        return self.task_names(), self.processor_names()
+
+    def is_empty(self):
+        return not self._plugins and not self._compounds
+
+    def _plugin_records(self):
+        for directory in self._plugins.values():
+            for record in directory["files"].values():
+                if record:
+                    yield record
+
+    def tasks(self):
+        """ Returns the name and description of all indexed tasks """
+        return sorted((entry for record in self._plugin_records() for entry in record["tasks"]),
+                      key=lambda entry: entry["name"])
+
+    def processors(self):
+        """ Returns the name and description of all indexed processors """
+        return sorted((entry for record in self._plugin_records() for entry in record["processors"]),
+                      key=lambda entry: entry["name"])
+
+    def task_names(self):
+        return [entry["name"] for entry in self.tasks()]
+
+    def processor_names(self):
+        return [entry["name"] for entry in self.processors()]
+
+    def compounds(self):
+        """ Returns the sorted names and file paths of all indexed compounds """
+        return sorted(
+            (os.path.splitext(os.path.basename(filepath))[0], filepath)
+            for directory in self._compounds.values() for filepath in directory["files"]
+        )
+
+    def _refresh_plugins(self):
+        seen = set()
+        changed = False
+        for path in self.plugin_paths:
+            if os.path.isdir(path):
+                changed = self._refresh_plugin_directory(os.path.abspath(path), seen) or changed
+
+        for directory in set(self._plugins) - seen:
+            del self._plugins[directory]
+            changed = True
+        return changed
+
+    def _refresh_plugin_directory(self, directory, seen):
+        if directory in seen:
+            return False
+        seen.add(directory)
+
+        changed = False
+        mtime = _mtime(directory)
+        entry = self._plugins.get(directory)
+
+        # the directory mtime only changes if entries were added, removed or renamed
+        if entry is None or entry["mtime"] != mtime:
+            names = os.listdir(directory)
+            previous = entry["files"] if entry else {}
+            entry = self._plugins[directory] = {
+                "mtime": mtime,
+                "subdirectories": sorted(
+                    os.path.join(directory, name) for name in names
+                    if os.path.isdir(os.path.join(directory, name))
+                ),
+                "files": dict(
+                    (os.path.join(directory, name), previous.get(os.path.join(directory, name)))
+                    for name in names if name.endswith(".py")
+                ),
+            }
+            changed = True
+
+        for filepath, record in list(entry["files"].items()):
+            if record is None or record["mtime"] != _mtime(filepath):
+                _LOG.debug("Indexing plugin file {}.".format(filepath))
+                entry["files"][filepath] = _scan_file(filepath)
+                changed = True
+
+        for subdirectory in entry["subdirectories"]:
+            changed = self._refresh_plugin_directory(subdirectory, seen) or changed
+
+        return changed
+
+    def _refresh_compounds(self):
+        path = self.compounds_path
+        if not path or not os.path.isdir(path):
+            changed = bool(self._compounds)
+            self._compounds = {}
+            return changed
+
+        path = os.path.abspath(path)
+        mtime = _mtime(path)
+        entry = self._compounds.get(path)
+        if entry is not None and entry["mtime"] == mtime and len(self._compounds) == 1:
+            return False
+
+        self._compounds = {
+            path: {
+                "mtime": mtime,
+                "files": sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".grf")),
+            }
+        }
+        return True
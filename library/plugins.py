@@ -0,0 +1,104 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Discovery of the jobtronaut plugins offered in the node menu. """
+
+import logging
+import threading
+
+from jobtronaut.constants import LOGGING_NAMESPACE
+
+_LOG = logging.getLogger("{}.gaffer.library".format(LOGGING_NAMESPACE))
+
+
+def scan():
+    """ Loads the jobtronaut plugin library
+
+    Returns:
+        tuple: the sorted names of all tasks and all processors
+
+    """
+    from jobtronaut.author.plugins import Plugins
+
+    plugins = Plugins()
+    return sorted(plugins.tasks), sorted(plugins.processors)
+
+
+class BackgroundScan(object):
+    """ Runs a scan function once in a daemon thread
+
+    Callbacks get the scan instance passed once the scan finished. They are
+    called from the worker thread, so UI code has to forward them to the UI
+    thread itself.
+    """
+    def __init__(self, function=scan):
+        self.result = None
+        self.error = None
+        self._function = function
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._finished = threading.Event()
+
+    def start(self):
+        """ Starts the scan unless it was started before """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="missioncontrol-scan")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def started(self):
+        return self._thread is not None
+
+    def finished(self):
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        self.start()
+        self._finished.wait(timeout)
+        return self.result
+
+    def add_callback(self, callback):
+        """ Registers a callback, it is called immediately if the scan finished already """
+        with self._lock:
+            if not self.finished():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _run(self):
+        try:
+            self.result = self._function()
+        except Exception as error:
+            _LOG.exception("Scanning the plugin library failed.")
+            self.error = error
+
+        with self._lock:
+            self._finished.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            callback(self)
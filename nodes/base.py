@@ -58,6 +58,11 @@ _ARGUMENTS_CONNECTION_COLOR = imath.Color3f(0.5, 0.5, 0.5)
 
 Expansion = namedtuple("Expansion", ["root", "arguments"])
 
+# plugin classes are shared by all nodes of the same type, so their source
+# only has to be read and parsed once per session
+_SOURCES = {}
+_EXPANSIONS = {}
+
 @contextlib.contextmanager
 def temporary_attribute_value(obj, attr, new_value):
     """ Temporarily set an attribute on an object for the duration of the context manager
@@ -89,7 +94,18 @@ def temporary_attribute_value(obj, attr, new_value):
         setattr(obj, attr, old_value)
 
 
+def get_source(cls):
+    try:
+        return _SOURCES[cls]
+    except KeyError:
+        source = _SOURCES[cls] = inspect.getsource(cls)
+        return source
+
+
 def get_expand_task_names(cls):
+    if cls in _EXPANSIONS:
+        return list(_EXPANSIONS[cls])
+
     class NodeVisitor(ast.NodeVisitor):
         def __init__(self, *args, **kwargs):
             super(NodeVisitor, self).__init__(*args, **kwargs)
@@ -105,9 +121,10 @@ def get_expand_task_names(cls):
                         )
                     )
 
-    tree = ast.parse(inspect.getsource(cls))
+    tree = ast.parse(get_source(cls))
     visitor = NodeVisitor()
     visitor.visit(tree)
+    _EXPANSIONS[cls] = tuple(visitor.expansions)
     return visitor.expansions
 
 
@@ -298,7 +315,7 @@ class GafferDependencyNodeBase(Gaffer.DependencyNode, GafferNodeBaseMixin):
 class JobtronautPluginBase(GafferTaskNodeBase):
 
     def add_code_nodules(self, plugin):
-        code_plug = Gaffer.StringPlug("source", defaultValue=inspect.getsource(plugin))
+        code_plug = Gaffer.StringPlug("source", defaultValue=get_source(plugin))
         Gaffer.Metadata.registerPlugValue(code_plug, "nodule:type", "")
         Gaffer.Metadata.registerValue(
             code_plug, "layout:section", "Code"
@@ -0,0 +1,216 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+import contextlib
+import cProfile
+import json
+import os
+import sys
+import threading
+
+from collections import OrderedDict, namedtuple
+from timeit import default_timer
+
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+
+Span = namedtuple("Span", ["name", "category", "start", "duration", "self_duration", "thread"])
+
+
+class PhaseTimer(object):
+    """ Collects wall time and call counts per named phase.
+
+    Phases may be nested, in that case the time of the inner phase is also
+    part of the time of the outer phase.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.total = 0.0
+        self._phases = OrderedDict()
+        self._start = default_timer()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = default_timer()
+        try:
+            yield
+        finally:
+            self.add(name, default_timer() - start)
+
+    def add(self, name, seconds, calls=1):
+        entry = self._phases.setdefault(name, [0, 0.0])
+        entry[0] += calls
+        entry[1] += seconds
+
+    def stop(self):
+        self.total = default_timer() - self._start
+        return self.total
+
+    def report(self):
+        return OrderedDict([
+            ("name", self.name),
+            ("total", self.total),
+            ("phases", [
+                OrderedDict([("phase", name), ("calls", calls), ("seconds", seconds)])
+                for name, (calls, seconds) in self._phases.items()
+            ])
+        ])
+
+    def write(self, filepath):
+        with open(filepath, "w") as fp:
+            json.dump(self.report(), fp, indent=4)
+
+    def log(self, logger):
+        logger.info("{}: {:.3f}s total".format(self.name, self.total))
+        for name, (calls, seconds) in sorted(self._phases.items(), key=lambda item: item[1][1], reverse=True):
+            logger.info("    {:<32} {:>8} calls {:>10.3f}s".format(name, calls, seconds))
+
+
+class ProfileCapture(object):
+    """ A cProfile capture that can be continued on other threads
+
+    cProfile only profiles the thread it got enabled on. Work handed over to a
+    worker thread is captured by activating the same capture there again.
+
+    Args:
+        filepath (str): the location of the stats file, readable by `pstats`
+        enabled (bool): allows to keep the call sites unconditional
+
+    """
+    def __init__(self, filepath, enabled=True):
+        self.filepath = filepath
+        self._profile = cProfile.Profile() if enabled else None
+
+    @contextlib.contextmanager
+    def active(self):
+        """ Profiles the wrapped code on the current thread """
+        if self._profile is None:
+            yield
+            return
+
+        self._profile.enable()
+        try:
+            yield
+        finally:
+            self._profile.disable()
+
+    def dump(self):
+        if self._profile is not None:
+            self._profile.dump_stats(self.filepath)
+
+
+class TraceRecorder(object):
+    """ Records nested, timestamped spans per thread
+
+    Unlike `PhaseTimer` every single span is kept, so the recording can be
+    exported as Chrome trace (chrome://tracing) or as a report sorted by
+    duration.
+    """
+    def __init__(self):
+        self.spans = []
+        self.marks = []
+        self._origin = default_timer()
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def span(self, name, category):
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        start = default_timer()
+        try:
+            yield
+        finally:
+            duration = default_timer() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += duration
+            self.spans.append(Span(
+                name, category, start - self._origin, duration, duration - children, threading.current_thread().name
+            ))
+
+    def mark(self, name):
+        """ Records a point in time, e.g. when the first window showed up """
+        self.marks.append((name, default_timer() - self._origin))
+
+    def write(self, filepath):
+        """ Writes a Chrome trace for .json files and a sorted report otherwise """
+        if filepath.endswith(".json"):
+            self.write_chrome_trace(filepath)
+        else:
+            self.write_report(filepath)
+
+    def write_chrome_trace(self, filepath):
+        threads = {}
+        events = []
+        for span in self.spans:
+            events.append({
+                "name": span.name, "cat": span.category, "ph": "X", "pid": os.getpid(),
+                "tid": threads.setdefault(span.thread, len(threads)),
+                "ts": span.start * 1e6, "dur": span.duration * 1e6,
+            })
+        for name, timestamp in self.marks:
+            events.append({"name": name, "ph": "i", "s": "g", "pid": os.getpid(), "tid": 0, "ts": timestamp * 1e6})
+
+        with open(filepath, "w") as fp:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fp)
+
+    def write_report(self, filepath):
+        with open(filepath, "w") as fp:
+            for name, timestamp in self.marks:
+                fp.write("{:>10.3f}s  {}\n".format(timestamp, name))
+            fp.write("\n{:>10} {:>10}  {:<10} {}\n".format("total", "self", "category", "name"))
+            for span in sorted(self.spans, key=lambda span: span.duration, reverse=True):
+                fp.write("{:>9.3f}s {:>9.3f}s  {:<10} {}\n".format(
+                    span.duration, span.self_duration, span.category, span.name
+                ))
+
+
+class ImportProfiler(object):
+    """ Records a span for every module that gets imported while active """
+    def __init__(self, recorder):
+        self._recorder = recorder
+        self._original_import = None
+
+    def __enter__(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+        return self
+
+    def __exit__(self, *args):
+        builtins.__import__ = self._original_import
+
+    def _import(self, name, *args, **kwargs):
+        # only first imports are of interest, everything else is a dictionary lookup
+        if name in sys.modules:
+            return self._original_import(name, *args, **kwargs)
+
+        with self._recorder.span(name, "import"):
+            return self._original_import(name, *args, **kwargs)
+
+
+def sidecar_path(filepath, suffix):
+    """ Returns the path of a report file living next to the given file. """
+    return "{}.{}".format(os.path.splitext(filepath)[0], suffix)
@@ -0,0 +1,183 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Parsing and application of the `-settings` overrides of the application.
+
+All overrides are resolved and parsed before the first one is applied. Plug
+paths are looked up in an index that is built with a single walk over the
+script (or dispatcher), values are parsed according to the type of the plug
+they are meant for. All problems are collected, so a submitter gets to see
+every broken override at once.
+"""
+
+import ast
+
+from collections import namedtuple
+
+import Gaffer
+import IECore
+import imath
+
+Assignment = namedtuple("Assignment", ["identifier", "plug", "value"])
+SettingsError = namedtuple("SettingsError", ["identifier", "message"])
+
+_TRUE = ("1", "true", "yes", "on")
+_FALSE = ("0", "false", "no", "off")
+
+
+class PlugIndex(object):
+    """ Maps the relative names of all plugs below a parent to the plugs """
+    def __init__(self, parent):
+        self.parent = parent
+        self._plugs = {}
+
+        stack = list(parent.children())
+        while stack:
+            child = stack.pop()
+            if isinstance(child, Gaffer.Plug):
+                self._plugs[child.relativeName(parent)] = child
+            stack.extend(child.children())
+
+    def __len__(self):
+        return len(self._plugs)
+
+    def get(self, identifier):
+        return self._plugs.get(identifier)
+
+
+def _literal(text):
+    try:
+        return ast.literal_eval(text)
+    except (SyntaxError, ValueError):
+        return text
+
+
+def _evaluate(text):
+    # compound values like imath.V3f(1, 2, 3) were always passed as expressions
+    return eval(text, {"imath": imath, "IECore": IECore, "Gaffer": Gaffer})
+
+
+def parse_value(plug, text):
+    """ Converts the text given on the command line into a value for the plug
+
+    Raises:
+        ValueError: if the text doesn't describe a value of the plug's type
+
+    """
+    if isinstance(plug, Gaffer.BoolPlug):
+        if text.lower() in _TRUE:
+            return True
+        if text.lower() in _FALSE:
+            return False
+        raise ValueError("\"{}\" is not a boolean value.".format(text))
+
+    if isinstance(plug, Gaffer.IntPlug):
+        return int(text)
+
+    if isinstance(plug, Gaffer.FloatPlug):
+        return float(text)
+
+    if isinstance(plug, Gaffer.StringPlug):
+        # quoted strings are still supported, they used to be required
+        value = _literal(text)
+        return value if isinstance(value, basestring) else text
+
+    value = _literal(text)
+    if isinstance(value, (list, tuple)):
+        if isinstance(plug, Gaffer.ValuePlug) and hasattr(plug, "ValueType"):
+            return plug.ValueType(*value) if plug.children() else plug.ValueType(list(value))
+        return value
+    if value is text:
+        return _evaluate(text)
+    return value
+
+
+def resolve(settings, scriptnode, dispatcher=None):
+    """ Resolves and parses all overrides without applying any of them
+
+    Args:
+        settings (list): alternating identifiers and values, identifiers
+            starting with "dispatcher." refer to plugs of the dispatcher
+        scriptnode (Gaffer.ScriptNode): the script the other identifiers
+            are relative to
+        dispatcher (GafferDispatch.Dispatcher): the dispatcher
+
+    Returns:
+        tuple: the list of `Assignment`s and the list of `SettingsError`s
+
+    """
+    if len(settings) % 2:
+        return [], [SettingsError("settings", "\"settings\" parameter must have matching entry/value pairs")]
+
+    indices = {}
+    assignments = []
+    errors = []
+    for i in range(0, len(settings), 2):
+        key = settings[i].lstrip("-")
+        text = settings[i + 1]
+
+        if key.startswith("dispatcher.") and dispatcher is not None:
+            scope, parent = "dispatcher", dispatcher
+            identifier = key.partition("dispatcher.")[-1]
+        else:
+            scope, parent = "script", scriptnode
+            identifier = key
+
+        if scope not in indices:
+            indices[scope] = PlugIndex(parent)
+
+        plug = indices[scope].get(identifier)
+        if plug is None:
+            errors.append(SettingsError(
+                key, "\"{}\" does not contain a plug named \"{}\".".format(parent.getName(), identifier)
+            ))
+            continue
+        if not plug.settable():
+            errors.append(SettingsError(key, "\"{}\" cannot be set.".format(identifier)))
+            continue
+
+        try:
+            value = parse_value(plug, text)
+        except Exception as exception:
+            errors.append(SettingsError(key, "Invalid value \"{}\": {}".format(text, exception)))
+            continue
+
+        assignments.append(Assignment(key, plug, value))
+
+    return assignments, errors
+
+
+def apply(assignments):
+    """ Sets all resolved values
+
+    Returns:
+        list: a `SettingsError` for every value the plug refused
+    """
+    errors = []
+    for assignment in assignments:
+        try:
+            assignment.plug.setValue(assignment.value)
+        except Exception as exception:
+            errors.append(SettingsError(assignment.identifier, str(exception)))
+    return errors
@@ -0,0 +1,275 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+""" Snapshots of loaded scripts for faster loading.
+
+`ScriptNode.load()` executes the serialised script line by line. A snapshot
+holds the result of that instead: the node types and constructor arguments,
+the plug values that differ from the defaults, the dynamic plugs, metadata
+and connections. It is stored next to the script, keyed by the hash of the
+script's content, and rebuilds the graph in one go.
+
+Only the task node types and Dots are supported. Scripts containing anything
+else (Boxes, References, Expressions, ...) are loaded the regular way.
+"""
+
+import hashlib
+import importlib
+import logging
+import pickle
+
+import Gaffer
+import GafferDispatch
+import IECore
+import imath
+
+from jobtronaut.constants import LOGGING_NAMESPACE
+
+from missioncontrol.nodes import (
+    HierarchyTask,
+    JobtronautProcessor,
+    JobtronautTask,
+    Parallel,
+    Root,
+    Serial
+)
+from missioncontrol.profiling import sidecar_path
+
+_LOG = logging.getLogger("{}.gaffer.snapshot".format(LOGGING_NAMESPACE))
+
+_VERSION = 1
+
+_NAMESPACE = {"Gaffer": Gaffer, "GafferDispatch": GafferDispatch, "IECore": IECore, "imath": imath}
+
+
+class UnsupportedError(ValueError):
+    """ Raised for scripts that can't be represented by a snapshot """
+
+
+def snapshot_path(filepath):
+    return sidecar_path(filepath, "snapshot")
+
+
+def script_hash(filepath):
+    with open(filepath, "rb") as fp:
+        return hashlib.sha1(fp.read()).hexdigest()
+
+
+def _constructor(node):
+    if isinstance(node, (JobtronautTask, JobtronautProcessor)):
+        return (node.getName(), node.getChild("type").getValue())
+    if isinstance(node, (HierarchyTask, Root, Parallel, Serial, Gaffer.Dot)):
+        return (node.getName(),)
+    raise UnsupportedError("{} nodes are not supported.".format(node.typeName()))
+
+
+def _repr(value):
+    try:
+        return IECore.repr(value)
+    except Exception:
+        raise UnsupportedError("Can't represent {!r}.".format(value))
+
+
+def _is_dynamic_value(plug):
+    return (
+        isinstance(plug, Gaffer.NameValuePlug) and plug.getFlags(Gaffer.Plug.Flags.Dynamic)
+        and isinstance(plug.parent(), Gaffer.CompoundDataPlug)
+    )
+
+
+def _metadata(target, node):
+    path = "" if target.isSame(node) else target.relativeName(node)
+    return [
+        (path, key, _repr(Gaffer.Metadata.value(target, key)))
+        for key in Gaffer.Metadata.registeredValues(target, instanceOnly=True, persistentOnly=True)
+    ]
+
+
+def _describe_plugs(node, record, connections, scriptnode):
+    record["metadata"].extend(_metadata(node, node))
+
+    stack = list(node.children(Gaffer.Plug))
+    while stack:
+        plug = stack.pop(0)
+        if not plug.getFlags(Gaffer.Plug.Flags.Serialisable):
+            # like fileName or unsavedChanges of the script, they aren't saved either
+            continue
+
+        source = plug.getInput()
+        if source is not None:
+            if source.node() is None or not source.node().parent().isSame(scriptnode):
+                raise UnsupportedError("{} has an input from outside of the script.".format(plug.fullName()))
+            connections.append((plug.relativeName(scriptnode), source.relativeName(scriptnode)))
+
+        if _is_dynamic_value(plug):
+            record["dynamic"].append((
+                plug.parent().relativeName(node), plug.getName(),
+                _repr(plug["name"].getValue()), _repr(plug["value"].getValue()),
+                _repr(plug["enabled"].getValue()) if "enabled" in plug else None,
+            ))
+            record["metadata"].extend(_metadata(plug, node))
+            stack.extend(plug.children(Gaffer.Plug))
+            continue
+
+        if plug.getFlags(Gaffer.Plug.Flags.Dynamic) and not isinstance(node, Gaffer.Dot) \
+                and not _is_dynamic_value(plug.parent()):
+            raise UnsupportedError("{} is a dynamic plug.".format(plug.fullName()))
+
+        record["metadata"].extend(_metadata(plug, node))
+        if source is None and plug.direction() == Gaffer.Plug.Direction.In and isinstance(plug, Gaffer.ValuePlug) \
+                and not plug.children() and not plug.isSetToDefault():
+            record["values"].append((plug.relativeName(node), _repr(plug.getValue())))
+
+        stack.extend(plug.children(Gaffer.Plug))
+
+
+def _dot_prototype(dot):
+    """ Returns the first plug a Dot is connected to which is not part of a Dot """
+    plug = dot.getChild("in")
+    while plug is not None and isinstance(plug.node(), Gaffer.Dot):
+        plug = plug.node().getChild("in").getInput()
+    if plug is None:
+        outputs = dot.getChild("out").outputs() if dot.getChild("out") else ()
+        plug = next((output for output in outputs if not isinstance(output.node(), Gaffer.Dot)), None)
+    return plug
+
+
+def describe(scriptnode):
+    """ Returns the picklable description of the nodes in a script
+
+    Raises:
+        UnsupportedError: if the script can't be described
+
+    """
+    connections = []
+    script = {"values": [], "dynamic": [], "metadata": []}
+    _describe_plugs(scriptnode, script, connections, scriptnode)
+
+    nodes = []
+    dots = []
+    for node in scriptnode.children(Gaffer.Node):
+        record = {
+            "module": type(node).__module__,
+            "class": type(node).__name__,
+            "arguments": _constructor(node),
+            "values": [],
+            "dynamic": [],
+            "metadata": [],
+        }
+        _describe_plugs(node, record, connections, scriptnode)
+        nodes.append(record)
+
+        if isinstance(node, Gaffer.Dot) and node.getChild("in") is not None:
+            prototype = _dot_prototype(node)
+            if prototype is None:
+                raise UnsupportedError("Can't determine the type of {}.".format(node.fullName()))
+            dots.append((node.getName(), prototype.relativeName(scriptnode)))
+
+    return {"script": script, "nodes": nodes, "dots": dots, "connections": connections}
+
+
+def _apply(node, record, scriptnode):
+    for parent, name, key, value, enabled in record["dynamic"]:
+        arguments = [eval(key, _NAMESPACE), eval(value, _NAMESPACE)]
+        if enabled is not None:
+            arguments.append(eval(enabled, _NAMESPACE))
+        node.descendant(parent).addChild(Gaffer.NameValuePlug(
+            *arguments, name=name, flags=Gaffer.Plug.Flags.Default | Gaffer.Plug.Flags.Dynamic
+        ))
+
+    for path, value in record["values"]:
+        node.descendant(path).setValue(eval(value, _NAMESPACE))
+
+    for path, key, value in record["metadata"]:
+        Gaffer.Metadata.registerValue(node.descendant(path) if path else node, key, eval(value, _NAMESPACE))
+
+
+def build(scriptnode, description):
+    """ Creates the nodes of a description inside the given script """
+    with Gaffer.DirtyPropagationScope():
+        nodes = []
+        for record in description["nodes"]:
+            cls = getattr(importlib.import_module(record["module"]), record["class"])
+            node = cls(*record["arguments"])
+            scriptnode.addChild(node)
+            nodes.append(node)
+
+        for name, prototype in description["dots"]:
+            scriptnode[name].setup(scriptnode.descendant(prototype))
+
+        _apply(scriptnode, description["script"], scriptnode)
+        for node, record in zip(nodes, description["nodes"]):
+            _apply(node, record, scriptnode)
+
+        for destination, source in description["connections"]:
+            scriptnode.descendant(destination).setInput(scriptnode.descendant(source))
+
+
+def save(scriptnode, filepath):
+    """ Stores a snapshot of the loaded script next to it
+
+    Returns:
+        bool: False if the script isn't supported or the snapshot couldn't be written
+    """
+    try:
+        description = describe(scriptnode)
+    except UnsupportedError as error:
+        _LOG.debug("No snapshot for {}: {}".format(filepath, error))
+        return False
+
+    data = {"version": _VERSION, "hash": script_hash(filepath), "description": description}
+    try:
+        with open(snapshot_path(filepath), "wb") as fp:
+            pickle.dump(data, fp, pickle.HIGHEST_PROTOCOL)
+    except (IOError, OSError):
+        _LOG.debug("Failed to write the snapshot of {}.".format(filepath), exc_info=True)
+        return False
+    return True
+
+
+def load(scriptnode, filepath):
+    """ Loads the script from its snapshot, if there's one matching the script's content
+
+    Returns:
+        bool: True if the script was loaded, otherwise the script is left empty
+    """
+    try:
+        with open(snapshot_path(filepath), "rb") as fp:
+            data = pickle.load(fp)
+    except (IOError, OSError, EOFError, pickle.UnpicklingError):
+        return False
+
+    if data.get("version") != _VERSION or data.get("hash") != script_hash(filepath):
+        return False
+
+    try:
+        build(scriptnode, data["description"])
+    except Exception:
+        _LOG.warning("Failed to load {} from its snapshot, loading the script instead.".format(filepath),
+                     exc_info=True)
+        scriptnode.deleteNodes()
+        return False
+
+    scriptnode["unsavedChanges"].setValue(False)
+    return True
@@ -22,7 +22,26 @@
 #  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
 # ######################################################################################################################
 
+import os
+
 import GafferUI
 
-# seem to be required to activate backup handling
+from missioncontrol.backups import AsyncBackups
+
+# seem to be required to activate backup handling, the File menu offers to recover
+# scripts from the backups Gaffer's own instance finds
 GafferUI.Backups.acquire(application)
+
+if os.getenv("MISSIONCONTROL_ASYNC_BACKUPS", "1") != "0":
+    # AsyncBackups writes the same files in place of Gaffer's periodic backups
+    preferences = application.root()["preferences"]["backups"]
+    # a frequency of 0 means the user turned backups off
+    frequency = preferences["frequency"].getValue()
+    if frequency:
+        AsyncBackups.acquire(
+            application,
+            frequency=frequency * 60.0,  # the preference is in minutes
+            files=preferences["files"].getValue(),
+            file_name=preferences["fileName"].getValue()
+        )
+        preferences["frequency"].setValue(0)
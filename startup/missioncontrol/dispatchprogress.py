@@ -0,0 +1,85 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+# shows the progress of dispatches running in the background, see missioncontrol.dispatch.background
+import functools
+
+import Gaffer
+import GafferUI
+
+from missioncontrol.dispatch import background
+
+# keeps the windows alive until their dispatch finished
+_WINDOWS = set()
+
+
+class _ProgressWindow(GafferUI.Window):
+
+    def __init__(self, dispatch):
+        GafferUI.Window.__init__(self, "Dispatching {}".format(dispatch.label))
+
+        self.__dispatch = dispatch
+        with self:
+            with GafferUI.ListContainer(spacing=4, borderWidth=8):
+                self.__label = GafferUI.Label("Collecting tasks...")
+                self.__cancelButton = GafferUI.Button("Cancel")
+
+        self.__cancelClickedConnection = self.__cancelButton.clickedSignal().connect(
+            Gaffer.WeakMethod(self.__cancelClicked)
+        )
+
+        # the dispatch reports from its worker thread
+        dispatch.progressed.append(functools.partial(_on_ui_thread, self.__progressed))
+        dispatch.finished.append(functools.partial(_on_ui_thread, self.__finished))
+
+    def __cancelClicked(self, button):
+        self.__dispatch.cancel()
+        self.__label.setText("Cancelling...")
+        self.__cancelButton.setEnabled(False)
+
+    def __progressed(self, done, total, label):
+        if not self.__dispatch.cancelled.is_set():
+            self.__label.setText("{}/{} {}".format(done, total, label))
+
+    def __finished(self, dispatch, error):
+        self.setVisible(False)
+        _WINDOWS.discard(self)
+
+        if error and not dispatch.cancelled.is_set():
+            GafferUI.ErrorDialogue(
+                "Dispatch", message="Dispatching {} failed.".format(dispatch.label), details=error
+            ).waitForButton()
+
+
+def _on_ui_thread(function, *args):
+    GafferUI.EventLoop.executeOnUIThread(functools.partial(function, *args))
+
+
+def _dispatch_started(dispatch):
+    window = _ProgressWindow(dispatch)
+    _WINDOWS.add(window)
+    window.setVisible(True)
+
+
+background.add_observer(_dispatch_started)
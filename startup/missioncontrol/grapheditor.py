@@ -33,6 +33,15 @@ import GafferDispatchUI
 
 from jobtronaut.constants import LOGGING_NAMESPACE
 
+from missioncontrol.dispatch import (
+    analysis,
+    validation
+)
+from missioncontrol.nodes import (
+    HierarchyTask,
+    Root
+)
+
 _LOG = logging.getLogger("{}.gaffer.grapheditor".format(LOGGING_NAMESPACE))
 
 # Slots ================================================================================================================
@@ -66,6 +75,12 @@ def _node_context_menu_request(graph_editor, node, menu_definition):
     # check http://www.gafferhq.org/news/tip-bookmarks/
     GafferUI.GraphBookmarksUI.appendNodeContextMenuDefinitions(graph_editor, node, menu_definition)
 
+    # lets us check the graph for problems before dispatching it
+    if isinstance(node, (Root, HierarchyTask)):
+        menu_definition.append("/ValidationDivider", {"divider": True})
+        menu_definition.append("/Validate", {"command": functools.partial(_validate, node=node)})
+        menu_definition.append("/Analyze", {"command": functools.partial(_analyze, node=node)})
+
     # append the menu entry specifically for the Box Node
     if node.typeName() == "Gaffer::Box":
         menu_definition.append("/ContentsDivider", {"divider": True})
@@ -73,6 +88,37 @@ def _node_context_menu_request(graph_editor, node, menu_definition):
                 _export_compound, node=node)})
 
 
+def _validate(menu=None, node=None):
+    issues = validation.validate(node)
+    path = node.relativeName(node.scriptNode())
+
+    if not issues:
+        _LOG.info("No problems found downstream of {}.".format(path))
+        return
+
+    dialogue = GafferUI.ErrorDialogue(
+        "Validation",
+        message="Found {} problem(s) downstream of {}.".format(len(issues), path),
+        details=validation.format_issues(issues)
+    )
+    dialogue.waitForButton(parentWindow=menu.ancestor(GafferUI.Window) if menu else None)
+
+
+def _analyze(menu=None, node=None):
+    try:
+        report = analysis.from_graph(node)
+    except ValueError as error:
+        dialogue = GafferUI.ErrorDialogue("Analysis", message=str(error))
+        dialogue.waitForButton(parentWindow=menu.ancestor(GafferUI.Window) if menu else None)
+        return
+
+    window = GafferUI.Window("Analysis of {}".format(node.relativeName(node.scriptNode())))
+    window.setChild(GafferUI.MultiLineTextWidget(text=analysis.format_report(report), editable=False))
+    if menu:
+        menu.ancestor(GafferUI.Window).addChildWindow(window, removeOnClose=True)
+    window.setVisible(True)
+
+
 def _export_compound(menu=None, node=None):
     def _load(filepath, node, menu):
         node.load(filepath)
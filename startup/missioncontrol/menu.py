@@ -26,11 +26,15 @@
 import functools
 import logging
 import os
+import re
 
 import Gaffer
 import GafferUI
 import IECore
 
+from missioncontrol.library.compounds import CompoundWatcher
+from missioncontrol.library.index import MenuIndex
+from missioncontrol.library.plugins import BackgroundScan
 from missioncontrol.nodes import (
     JobtronautTask,
     JobtronautProcessor,
@@ -42,41 +46,120 @@ from missioncontrol.nodes import (
 
 _LOG = logging.getLogger("trixter.gaffer.menu")
 
+_PLUGIN_MENU_PATHS = ("/Tasks", "/Processors")
+_COMPOUNDS_MENU_PATH = "/Compounds"
+_MENU_INDEX = MenuIndex()
+_PLUGIN_SCAN = BackgroundScan(_MENU_INDEX.refresh)
+_COMPOUNDS_POLL_INTERVAL = float(os.getenv("MISSIONCONTROL_COMPOUNDS_POLL_INTERVAL", 10.0))
 
-def append_compounds_to_menu(menu):
+
+def _remove_menu_path(menu, path):
+    menu.definition().removeMatching("^{}(/|$)".format(re.escape(path)))
+
+
+def append_compounds_to_menu(menu, compounds):
     def _load(filepath, node, menu):
         node.load(filepath)
 
-    compounds_path = os.getenv("GAFFER_COMPOUNDS_PATH")
-    if not compounds_path or not os.path.exists(compounds_path):
-        _LOG.info("GAFFER_COMPOUNDS_PATH not set or the path does not exist. No compounds will be loaded.")
-        return
-    for compound in os.listdir(compounds_path):
-        name, ext = os.path.splitext(compound)
-        if ext == ".grf":
-            menu_entry = "/Compounds/{}".format(name)
-            filepath = os.path.join(compounds_path, compound)
-            menu.append(menu_entry,
-                        functools.partial(Gaffer.Reference, name),
-                        postCreator=functools.partial(_load, filepath),
-                        searchText=name)
-
-
-def append_jobtronaut_plugins_to_menu(menu):
-    from jobtronaut.author.plugins import Plugins
-    tasks = Plugins().tasks
-    processors = Plugins().processors
-
-    for name in sorted(tasks):
+    for name, filepath in compounds:
+        menu_entry = "{}/{}".format(_COMPOUNDS_MENU_PATH, name)
+        menu.append(menu_entry,
+                    functools.partial(Gaffer.Reference, name),
+                    postCreator=functools.partial(_load, filepath),
+                    searchText=name)
+
+
+def append_jobtronaut_plugins_to_menu(menu, tasks, processors):
+    for name in tasks:
         menu.append("/Tasks/{}".format(name),
                     functools.partial(JobtronautTask, name, name),
                     searchText=name)
-    for name in sorted(processors):
+    for name in processors:
         menu.append("/Processors/{}".format(name),
                     functools.partial(JobtronautProcessor, name, name),
                     searchText=name)
 
 
+def _pending_plugins_menu():
+    # opening the menu before the idle callback kicked in starts the scan as well
+    _PLUGIN_SCAN.start()
+
+    definition = IECore.MenuDefinition()
+    if _PLUGIN_SCAN.error:
+        definition.append("/Loading the plugins failed", {"active": False, "description": str(_PLUGIN_SCAN.error)})
+    else:
+        definition.append("/Loading plugins...", {"active": False})
+    return definition
+
+
+def watch_compounds(menu, directory, known):
+    """ Keeps the compounds menu in sync with the compounds directory, so
+    compounds exported by others show up without a restart.
+    """
+    def _update(changes):
+        for name, _ in changes.removed:
+            _remove_menu_path(menu, "{}/{}".format(_COMPOUNDS_MENU_PATH, name))
+        append_compounds_to_menu(menu, changes.added + changes.updated)
+        _LOG.info("Compounds changed: {} added, {} removed, {} updated.".format(*map(len, changes)))
+
+    watcher = CompoundWatcher(
+        directory,
+        lambda changes: GafferUI.EventLoop.executeOnUIThread(functools.partial(_update, changes)),
+        interval=_COMPOUNDS_POLL_INTERVAL
+    )
+    watcher.start(known=known)
+    return watcher
+
+
+def append_library_to_menu(menu):
+    """ Adds the plugins and compounds to the node menu
+
+    The entries are taken from the on-disk index right away. The index gets
+    validated against the plugin and compound directories in the background
+    and the menus are updated in case anything changed. Without a usable index
+    the plugin submenus show a placeholder until the scan finished, so we
+    never wait for the network storage before the window shows up.
+    """
+    if _MENU_INDEX.load():
+        shown = {"plugins": (_MENU_INDEX.task_names(), _MENU_INDEX.processor_names()),
+                 "compounds": _MENU_INDEX.compounds()}
+        append_jobtronaut_plugins_to_menu(menu, *shown["plugins"])
+        append_compounds_to_menu(menu, shown["compounds"])
+    else:
+        shown = {"plugins": None, "compounds": []}
+        for path in _PLUGIN_MENU_PATHS:
+            menu.definition().append(path, {"subMenu": _pending_plugins_menu})
+
+    def _populate(scan):
+        # a failed plugin scan keeps the plugin menus as they are, compounds are handled regardless
+        if not scan.error and scan.result != shown["plugins"]:
+            for path in _PLUGIN_MENU_PATHS:
+                _remove_menu_path(menu, path)
+            append_jobtronaut_plugins_to_menu(menu, *scan.result)
+            shown["plugins"] = scan.result
+            _LOG.info("Loaded {} tasks and {} processors into the node menu.".format(*map(len, scan.result)))
+
+        compounds = _MENU_INDEX.compounds()
+        if compounds != shown["compounds"]:
+            _remove_menu_path(menu, _COMPOUNDS_MENU_PATH)
+            append_compounds_to_menu(menu, compounds)
+            shown["compounds"] = compounds
+
+        if not _MENU_INDEX.compounds_path or not os.path.exists(_MENU_INDEX.compounds_path):
+            _LOG.info("GAFFER_COMPOUNDS_PATH not set or the path does not exist. No compounds will be loaded.")
+        elif _COMPOUNDS_POLL_INTERVAL > 0:
+            watch_compounds(menu, _MENU_INDEX.compounds_path, [filepath for _, filepath in compounds])
+
+    def _start_scan():
+        _PLUGIN_SCAN.start()
+        return False  # Remove idle callback
+
+    _PLUGIN_SCAN.add_callback(
+        lambda scan: GafferUI.EventLoop.executeOnUIThread(functools.partial(_populate, scan))
+    )
+    GafferUI.EventLoop.addIdleCallback(_start_scan)
+
+
 # ======================================================================================================================
 # define the main window
 application_window_menu = GafferUI.ScriptWindow.menuDefinition(application)
@@ -108,8 +191,7 @@ nodeMenu.append("/Utility/Dot", Gaffer.Dot)
 
 nodeMenu.append("/Utility/Dot", Gaffer.Dot)
 # nodeMenu.append("/FTrack/InitializeFTrackSession", nodes.InitializeFTrackSession, searchText="InitializeFTrackSession")
-# append_compounds_to_menu(nodeMenu)
-append_jobtronaut_plugins_to_menu(nodeMenu)
+append_library_to_menu(nodeMenu)
 
 # nodeMenu.definition().append("/Utility/Backdrop", {"command": GafferUI.BackdropUI.nodeMenuCreateCommand})
 # nodeMenu.append("/Utility/Reference", GafferUI.ReferenceUI.nodeMenuCreateCommand)
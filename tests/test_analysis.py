@@ -0,0 +1,54 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+import unittest
+
+from missioncontrol.dispatch.analysis import (
+    TaskInfo,
+    analyze
+)
+from missioncontrol.dispatch.structure import (
+    List,
+    Tuple
+)
+
+# a per element HierarchyTask running C once per element
+_TASKS = {"Shot": TaskInfo(List(["C"]), True)}
+
+
+class BottleneckTest(unittest.TestCase):
+    def bottlenecks(self, structure):
+        report = analyze(structure, _TASKS, {"A": 4, "C": 4.5}, elements=3)
+        return [bottleneck["task"] for bottleneck in report["bottlenecks"]]
+
+    def test_units_overlapping_others_are_no_bottlenecks(self):
+        # Sync runs from 4 to 5 while the Cs run until 4.5, even though nothing else shares its level
+        self.assertEqual(self.bottlenecks(List([Tuple(["A", "Sync"]), "Shot"])), [])
+
+    def test_units_running_alone_are_bottlenecks(self):
+        self.assertEqual(self.bottlenecks(Tuple(["A", "Shot", "Sync"])), ["A", "Sync"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+import shutil
+import tempfile
+import unittest
+
+import Gaffer
+
+from missioncontrol.dispatch import JobtronautDispatcher
+from missioncontrol.dispatch.trixterdispatcher import write_taskfiles
+from missioncontrol.nodes import (
+    HierarchyTask,
+    Root
+)
+from missioncontrol.profiling import PhaseTimer
+
+
+class CompoundTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="missioncontrol_test_")
+        self.taskfile = "{}/tasks.py".format(self.directory)
+
+        self.scriptnode = Gaffer.ScriptNode()
+        self.scriptnode.addChild(Root("Root"))
+        for name in ("Box1", "Box2"):
+            box = Gaffer.Box(name)
+            self.scriptnode.addChild(box)
+            box.addChild(HierarchyTask("Render"))
+            box["Render"]["title"].setValue("Render")
+            Gaffer.PlugAlgo.promote(box["Render"]["in"])
+            box["in"].setInput(self.scriptnode["Root"]["out"])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_traversal_enters_compounds(self):
+        nodes = JobtronautDispatcher.get_hierarchy_nodes(self.scriptnode["Root"], self.scriptnode)
+        self.assertEqual(
+            sorted(node.relativeName(self.scriptnode) for node in nodes), ["Box1.Render", "Box2.Render"]
+        )
+
+    def test_identical_compounds_share_their_definition(self):
+        snapshot = JobtronautDispatcher().snapshot([self.scriptnode["Root"]], self.taskfile, PhaseTimer("test"))
+        self.assertEqual(list(snapshot.shared.values()), [["Box1.Render", "Box2.Render"]])
+
+        write_taskfiles(snapshot, PhaseTimer("test"))
+        with open(self.taskfile) as fp:
+            code = fp.read()
+        self.assertEqual(code.count("title = '''Render'''"), 1)
+        self.assertIn("class _SharedTask0(object):", code)
+        self.assertIn("class Render(_SharedTask0, Task):", code)
+        self.assertIn("class Render_1(_SharedTask0, Task):", code)
+
+
+if __name__ == "__main__":
+    unittest.main()
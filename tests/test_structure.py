@@ -0,0 +1,76 @@
+# ######################################################################################################################
+#  Copyright 2020 TRIXTER GmbH                                                                                         #
+#                                                                                                                      #
+#  Redistribution and use in source and binary forms, with or without modification, are permitted provided             #
+#  that the following conditions are met:                                                                              #
+#                                                                                                                      #
+#  1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following #
+#  disclaimer.                                                                                                         #
+#                                                                                                                      #
+#  2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the        #
+#  following disclaimer in the documentation and/or other materials provided with the distribution.                    #
+#                                                                                                                      #
+#  3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote     #
+#  products derived from this software without specific prior written permission.                                      #
+#                                                                                                                      #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,  #
+#  INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE   #
+#  DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,  #
+#  SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS        #
+#  OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF           #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY    #
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.                                 #
+# ######################################################################################################################
+
+import unittest
+
+from missioncontrol.dispatch.structure import (
+    List,
+    Tuple,
+    normalize
+)
+
+
+class NormalizeTest(unittest.TestCase):
+    def assertNormalized(self, structure, expected):
+        normalized = normalize(structure)
+        self.assertEqual(normalized, expected)
+        self.assertIs(type(normalized), type(expected))
+
+    def test_task_names_are_kept(self):
+        self.assertNormalized("A", "A")
+
+    def test_nested_groups_of_the_same_kind_are_flattened(self):
+        self.assertNormalized(List(["A", List(["B", List(["C"])])]), List(["A", "B", "C"]))
+        self.assertNormalized(Tuple(["A", Tuple(["B", "C"])]), Tuple(["A", "B", "C"]))
+
+    def test_groups_of_different_kinds_are_kept(self):
+        self.assertNormalized(List(["A", Tuple(["B", "C"])]), List(["A", Tuple(["B", "C"])]))
+        self.assertNormalized(Tuple(["A", List(["B", "C"])]), Tuple(["A", List(["B", "C"])]))
+
+    def test_empty_groups_are_dropped(self):
+        self.assertNormalized(List(["A", List(), Tuple()]), "A")
+        self.assertNormalized(Tuple([List(), "A", "B"]), Tuple(["A", "B"]))
+        self.assertNormalized(List([List(), Tuple()]), List())
+
+    def test_groups_of_a_single_entry_are_replaced_by_it(self):
+        self.assertNormalized(List([Tuple(["A"])]), "A")
+        self.assertNormalized(Tuple([List(["A", "B"])]), List(["A", "B"]))
+
+    def test_repetitions_in_parallel_groups_are_removed(self):
+        self.assertNormalized(List(["A", "B", "A"]), List(["A", "B"]))
+        self.assertNormalized(
+            List([Tuple(["A", "B"]), Tuple(["A", "B"]), Tuple(["B", "A"])]),
+            List([Tuple(["A", "B"]), Tuple(["B", "A"])])
+        )
+
+    def test_repetitions_in_serial_groups_are_kept(self):
+        self.assertNormalized(Tuple(["Sync", "Sync"]), Tuple(["Sync", "Sync"]))
+        self.assertNormalized(Tuple(["A", "Sync", Tuple(["Sync", "B"])]), Tuple(["A", "Sync", "Sync", "B"]))
+
+    def test_serial_groups_keep_their_order(self):
+        self.assertNormalized(Tuple(["B", "A", "B"]), Tuple(["B", "A", "B"]))
+
+
+if __name__ == "__main__":
+    unittest.main()